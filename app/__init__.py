@@ -3,7 +3,6 @@ import shutil
 from fastapi import FastAPI
 from fastapi.responses import RedirectResponse, ORJSONResponse, Response
 from starlette.middleware.cors import CORSMiddleware
-from fastapi.middleware.gzip import GZipMiddleware
 from contextlib import asynccontextmanager
 from app.controller import controller_router
 from app.utils.loger import log
@@ -17,8 +16,12 @@ from app.database._redis import (
 )
 from app.utils.response_cache import Cache
 from app.utils.response_cache import cache
+from app.utils.response_cache import singleflight
+from app.utils import warmup
+from app.utils.rate_limit import RateLimiter
+from app.utils.load_shedding import LoadShedder
 from app.utils.response import BaseResponse
-from app.utils.middleware import ForceSyncMiddleware, TimingMiddleware, EtagMiddleware, CountTrustableMiddleware, UncachePOSTMiddleware
+from app.utils.middleware import ForceSyncMiddleware, TimingMiddleware, EtagMiddleware, CountTrustableMiddleware, UncachePOSTMiddleware, CacheFrontMiddleware, CompressionMiddleware, ResponseFormatMiddleware, RateLimitMiddleware, LoadSheddingMiddleware
 from app.utils.metric import init_prometheus_metrics
 
 mcim_config = MCIMConfig.load()
@@ -28,12 +31,20 @@ mcim_config = MCIMConfig.load()
 async def lifespan(app: FastAPI):
     app.state.aio_redis_engine = init_redis_aioengine()
     init_sync_queue_redis_engine()
-    await app.state.aio_redis_engine.flushall()
     app.state.aio_mongo_engine = init_mongodb_aioengine()
     await setup_async_mongodb(app.state.aio_mongo_engine)
 
     if mcim_config.redis_cache:
         app.state.fastapi_cache = Cache.init(enabled=True)
+        # 不清空 Redis，按代际隔离缓存
+        await Cache.init_generation()
+        # 后台重放热门请求预热缓存
+        singleflight.background("warmup", lambda: warmup.replay(app))
+
+    if mcim_config.rate_limit.enabled:
+        RateLimiter.init()
+    if mcim_config.load_shedding.enabled:
+        LoadShedder.start()
 
     yield
 
@@ -52,8 +63,9 @@ init_prometheus_metrics(APP)
 
 APP.include_router(controller_router)
 
-# Gzip 中间件
-APP.add_middleware(GZipMiddleware, minimum_size=1000)
+# 压缩中间件，按 Accept-Encoding 协商 br / zstd / gzip
+if mcim_config.compression.enabled:
+    APP.add_middleware(CompressionMiddleware)
 
 # 计时中间件
 APP.add_middleware(TimingMiddleware)
@@ -70,6 +82,21 @@ APP.add_middleware(CountTrustableMiddleware)
 # 不缓存 POST 请求
 APP.add_middleware(UncachePOSTMiddleware)
 
+# 按路由分组限制并发，过载时拒绝低优先级请求
+if mcim_config.load_shedding.enabled:
+    APP.add_middleware(LoadSheddingMiddleware)
+
+# 缓存前置，命中时跳过上面的中间件和路由
+if mcim_config.cache_front:
+    APP.add_middleware(CacheFrontMiddleware)
+
+# 按 Accept 协商 JSON / MessagePack，需要在缓存前置之外
+APP.add_middleware(ResponseFormatMiddleware)
+
+# 按客户端令牌桶限流，超出预算直接返回 429
+if mcim_config.rate_limit.enabled:
+    APP.add_middleware(RateLimitMiddleware)
+
 # 跨域中间件
 APP.add_middleware(
     CORSMiddleware,
@@ -81,7 +108,7 @@ APP.add_middleware(
 
 
 @APP.get("/favicon.ico")
-@cache(never_expire=True)
+@cache(never_expire=True, l1=True)
 async def favicon():
     return RedirectResponse(url=mcim_config.favicon_url, status_code=301)
 
@@ -114,6 +141,6 @@ WELCOME_MESSAGE = {
     },
     description="MCIM API",
 )
-@cache(never_expire=True)
+@cache(never_expire=True, l1=True)
 async def root():
     return BaseResponse(content=WELCOME_MESSAGE)
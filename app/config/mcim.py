@@ -1,6 +1,6 @@
 import json
 import os
-from typing import Optional
+from typing import Dict, List, Optional
 from pydantic import BaseModel, ValidationError, validator
 from enum import Enum
 
@@ -30,6 +30,127 @@ class ExpireSecond(BaseModel):
     curseforge: Curseforge = Curseforge()
     modrinth: Modrinth = Modrinth()
 
+class L1Cache(BaseModel):
+    # 进程内缓存，每个 worker 独立一份，只对 cache(l1=True) 的路由生效
+    enabled: bool = True
+    max_size: int = 1024 * 1024 * 32  # bytes
+    ttl: int = 60  # 不超过路由自身的 expire
+
+
+class SingleFlight(BaseModel):
+    # 合并同一个 key 的并发缓存 miss，跨 worker 用 Redis 短锁
+    enabled: bool = True
+    lock_timeout: int = 10  # 秒，持锁 worker 的最长计算时间
+    poll_interval: float = 0.05  # 秒，未抢到锁的 worker 轮询缓存的间隔
+
+
+class CompressionRule(BaseModel):
+    # 按路径前缀覆盖压缩参数，未设置的沿用全局值
+    path_prefix: str
+    minimum_size: Optional[int] = None
+    gzip_level: Optional[int] = None
+    brotli_quality: Optional[int] = None
+    zstd_level: Optional[int] = None
+
+
+class Compression(BaseModel):
+    # 响应压缩，缓存时同时保存各编码的压缩版本，命中时按 Accept-Encoding 直接返回
+    enabled: bool = True
+    cache_variants: bool = True
+    minimum_size: int = 1000
+    gzip_level: int = 6
+    brotli_quality: int = 5  # 需要安装 brotli
+    zstd_level: int = 3  # 需要安装 zstandard
+    preferred_encodings: List[str] = ["br", "zstd", "gzip"]  # 同等 q 值时的优先级
+    rules: List[CompressionRule] = [
+        # 搜索结果命中率低，多数请求要现压，降低压缩等级
+        CompressionRule(
+            path_prefix="/modrinth/v2/search", brotli_quality=4, zstd_level=1
+        ),
+        CompressionRule(
+            path_prefix="/curseforge/v1/mods/search", brotli_quality=4, zstd_level=1
+        ),
+    ]
+
+
+class RouteGroupRule(BaseModel):
+    # 按 method + 路径前缀把路由分组，最长前缀优先，未匹配的归入 default
+    name: str
+    path_prefix: str
+    methods: Optional[List[str]] = None  # 为空时匹配所有 method
+
+
+class TokenBucket(BaseModel):
+    capacity: int  # 桶容量，即允许的突发请求数
+    refill_rate: float  # 每秒补充的令牌数，即长期平均速率
+
+
+class RateLimit(BaseModel):
+    # 按客户端的令牌桶限流，Redis 不可用时退化为进程内限流
+    enabled: bool = False
+    key_by: List[str] = ["ip", "ua"]  # ip / ua，组合起来区分客户端
+    trust_forwarded: bool = True  # 从 X-Forwarded-For 取客户端 IP，需要部署在反代之后
+    # 前面有几层追加 X-Forwarded-For 的反代，从右往左数第几个是客户端 IP，更左边的可以由客户端伪造
+    forwarded_hops: int = 1
+    exempt_ips: List[str] = ["127.0.0.1"]  # 只比对连接的对端地址，包括进程内的缓存预热请求
+    exempt_user_agents: List[str] = []  # UA 前缀
+    redis_retry_interval: int = 5  # 秒，Redis 出错后使用进程内限流的时间
+    local_max_clients: int = 100000  # 进程内限流最多记录的客户端数
+    # 按路由分组的预算，没有配置的分组不限流
+    buckets: Dict[str, TokenBucket] = {
+        "default": TokenBucket(capacity=120, refill_rate=20),
+        "bulk": TokenBucket(capacity=20, refill_rate=2),
+        "search": TokenBucket(capacity=30, refill_rate=5),
+        "file_cdn": TokenBucket(capacity=200, refill_rate=50),
+    }
+
+
+class LoadShedding(BaseModel):
+    # 每个 worker 独立计算：按路由分组限制并发，事件循环延迟或并发过高时优先拒绝低优先级分组
+    enabled: bool = False
+    # 各分组最大并发，没有配置的分组不限制
+    concurrency: Dict[str, int] = {
+        "search": 16,  # 依赖上游 API，慢的时候最先占满
+        "bulk": 32,
+        "default": 256,
+        "file_cdn": 256,
+    }
+    queue_timeout: float = 0.5  # 秒，等待并发名额的最长时间
+    low_priority_groups: List[str] = ["search", "bulk"]
+    max_loop_lag: float = 0.1  # 秒，超过后拒绝低优先级分组
+    lag_interval: float = 0.05  # 秒，事件循环延迟的采样间隔
+    low_priority_in_flight: int = 384  # 进行中的请求超过后拒绝低优先级分组
+    max_in_flight: int = 1024  # 进行中的请求超过后拒绝所有分组
+    retry_after: int = 2  # 秒，503 的 Retry-After
+
+
+class Streaming(BaseModel):
+    # 超大列表逐批从游标读取并流式输出 JSON 数组，避免一次性加载到内存
+    min_items: int = 500  # 少于该数量仍一次性返回
+    batch_size: int = 200  # MongoDB 游标每批数量
+    chunk_size: int = 1024 * 64  # bytes，攒够后发送一次
+    max_cache_size: int = 1024 * 1024 * 16  # bytes，超过则不写入响应缓存
+
+
+class Warmup(BaseModel):
+    # 记录热门 GET 请求，启动后在进程内重放预热缓存
+    enabled: bool = True
+    top_n: int = 500
+    window_hours: int = 24  # 按小时分桶，统计最近多少小时
+    flush_interval: int = 10  # 秒，记录批量写入 Redis 的间隔
+    concurrency: int = 8
+    timeout: int = 30  # 秒，单个请求超时
+    cooldown: int = 600  # 秒，同一缓存代际内两次预热的最短间隔
+    path_prefixes: List[str] = [
+        "/modrinth/v2/project",
+        "/modrinth/v2/tag",
+        "/curseforge/v1/mods",
+        "/curseforge/v1/categories",
+    ]
+    # 这些 route_groups 分组即使匹配 path_prefixes 也不记录，搜索会回源上游
+    exclude_groups: List[str] = ["search"]
+
+
 class FileCDNRedirectMode(str, Enum):
     # 重定向到原始链接
     ORIGIN = "origin"
@@ -55,6 +176,29 @@ class MCIMConfigModel(BaseModel):
     prometheus: bool = False
 
     redis_cache: bool = True
+    cache_front: bool = False  # ASGI 层按 URL 直接返回缓存，跳过路由
+    apply_indexes: bool = True  # 启动时在后台创建 app/database/indexes.py 中的索引
+    prerender: bool = False  # sync 时保存预渲染的 JSON，读取完整文档时直接拼接
+    msgpack: bool = True  # 允许 Accept: application/msgpack，需要安装 msgpack
+    cache_generation: Optional[str] = None  # 固定缓存代际，如部署时的代码 hash；为空则使用 Redis 中的代际
+    l1_cache: L1Cache = L1Cache()
+    single_flight: SingleFlight = SingleFlight()
+    compression: Compression = Compression()
+    warmup: Warmup = Warmup()
+    streaming: Streaming = Streaming()
+    route_groups: List[RouteGroupRule] = [
+        # 批量查询，单个请求的开销最大
+        RouteGroupRule(name="bulk", path_prefix="/curseforge/v1/", methods=["POST"]),
+        RouteGroupRule(name="bulk", path_prefix="/modrinth/v2/", methods=["POST"]),
+        RouteGroupRule(name="bulk", path_prefix="/curseforge/v1/fingerprints"),
+        RouteGroupRule(name="search", path_prefix="/curseforge/v1/mods/search"),
+        RouteGroupRule(name="search", path_prefix="/modrinth/v2/search"),
+        RouteGroupRule(name="file_cdn", path_prefix="/files/"),
+        RouteGroupRule(name="file_cdn", path_prefix="/data/"),
+        RouteGroupRule(name="file_cdn", path_prefix="/file_cdn/"),
+    ]
+    rate_limit: RateLimit = RateLimit()
+    load_shedding: LoadShedding = LoadShedding()
     open93home_endpoint: str = "http://open93home"
 
     expire_second: ExpireSecond = ExpireSecond()
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Request, BackgroundTasks
+from fastapi import APIRouter, Query, Request, BackgroundTasks
 from typing import List, Optional, Union, Annotated
 from pydantic import BaseModel, Field
 from odmantic import query
@@ -22,10 +22,21 @@ from app.models.response.curseforge import (
     Pagination,
 )
 from app.config.mcim import MCIMConfig
-from app.utils.response import TrustableResponse, UncachedResponse, BaseResponse
+from app.utils.response import (
+    TrustableResponse,
+    UncachedResponse,
+    BaseResponse,
+    BadRequestResponse,
+)
 from app.utils.network import request as request_async
 from app.utils.loger import log
 from app.utils.response_cache import cache
+from app.utils.response_cache.item_cache import get_items, set_items
+from app.utils.response_cache import tags
+from app.utils.response_cache import seek_cache
+from app.utils.projection import Projection, parse_projection
+from app.database import reader
+from app.utils import file_counts
 
 mcim_config = MCIMConfig.load()
 
@@ -38,6 +49,12 @@ v1_router = APIRouter(prefix="/v1", tags=["curseforge"])
 
 SEARCH_TIMEOUT = 3
 
+# 过期后继续返回旧值并后台刷新的时间
+STALE_TTL = 3600
+
+FIELDS_DESCRIPTION = "只返回这些字段，逗号分隔，支持 latestFiles.id 形式的嵌套字段"
+EXCLUDE_DESCRIPTION = "不返回这些字段，逗号分隔，不能与 fields 同时使用"
+
 """
 ModsSearchSortField
 1=Featured
@@ -125,7 +142,7 @@ async def check_search_result(request: Request, res: dict):
     description="Curseforge Category 信息",
     response_model=SearchResponse,
 )
-@cache(expire=mcim_config.expire_second.curseforge.search)
+@cache(expire=mcim_config.expire_second.curseforge.search, stale_ttl=STALE_TTL)
 async def curseforge_search(
     request: Request,
     gameId: int = 432,
@@ -184,19 +201,29 @@ async def curseforge_search(
 )
 @cache(expire=mcim_config.expire_second.curseforge.mod)
 async def curseforge_mod(
-    modId: Annotated[int, Field(ge=30000, lt=9999999)], request: Request
+    modId: Annotated[int, Field(ge=30000, lt=9999999)],
+    request: Request,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    exclude: Optional[str] = Query(None, description=EXCLUDE_DESCRIPTION),
 ):
     trustable: bool = True
-    mod_model: Optional[Mod] = await request.app.state.aio_mongo_engine.find_one(
-        Mod, Mod.id == modId
+    try:
+        projection = parse_projection(Mod, fields, exclude)
+    except ValueError as e:
+        return BadRequestResponse(str(e))
+    # 直接查原始文档，指定了字段时只取需要的字段
+    doc = await reader.find_one(
+        request.app.state.aio_mongo_engine, Mod, {"_id": modId}, projection
     )
-    if mod_model is None:
+    if doc is None:
         await add_curseforge_modIds_to_queue(modIds=[modId])
         log.debug(f"modId: {modId} not found, add to queue.")
         return UncachedResponse()
     return TrustableResponse(
-        content=CurseforgeBaseResponse(data=mod_model),
+        # 不经过 CurseforgeBaseResponse，否则部分字段会被补全为 Mod
+        content={"data": reader.render(Mod, doc, projection)},
         trustable=trustable,
+        cache_tags=[tags.cf_mod(modId)],
     )
 
 
@@ -210,31 +237,44 @@ class modIds_item(BaseModel):
     description="Curseforge Mods 信息",
     response_model=List[Mod],
 )
-# @cache(expire=mcim_config.expire_second.curseforge.mod)
 async def curseforge_mods(item: modIds_item, request: Request):
     trustable: bool = True
-    mod_models: Optional[List[Mod]] = await request.app.state.aio_mongo_engine.find(
-        Mod, query.in_(Mod.id, item.modIds)
-    )
-    mod_model_count = len(mod_models)
-    item_count = len(item.modIds)
-    if not mod_models:
-        await add_curseforge_modIds_to_queue(modIds=item.modIds)
-        log.debug(f"modIds: {item.modIds} not found, add to queue.")
+    modIds = list(dict.fromkeys(item.modIds))
+    # 先查单项缓存，只有缺失的去查数据库
+    mods = await get_items("cf:mod", modIds)
+    missing_modids = [modId for modId in modIds if modId not in mods]
+    if missing_modids:
+        mod_docs = await reader.find(
+            request.app.state.aio_mongo_engine, Mod, {"_id": {"$in": missing_modids}}
+        )
+        found_mods = {doc["_id"]: reader.render(Mod, doc) for doc in mod_docs}
+        await set_items(
+            "cf:mod",
+            found_mods,
+            expire=mcim_config.expire_second.curseforge.mod,
+            tags=lambda modId, _: [tags.cf_mod(modId)],
+        )
+        mods.update(found_mods)
+    mod_count = len(mods)
+    item_count = len(modIds)
+    if not mods:
+        await add_curseforge_modIds_to_queue(modIds=modIds)
+        log.debug(f"modIds: {modIds} not found, add to queue.")
         return TrustableResponse(
-            content=CurseforgeBaseResponse(data=[]).model_dump(),
+            content={"data": []},
             trustable=False,
         )
-    elif mod_model_count != item_count:
+    elif mod_count != item_count:
         # 找到不存在的 modid
-        not_match_modids = list(set(item.modIds) - set([mod.id for mod in mod_models]))
+        not_match_modids = [modId for modId in modIds if modId not in mods]
         await add_curseforge_modIds_to_queue(modIds=not_match_modids)
         log.debug(
-            f"modIds: {item.modIds} {mod_model_count}/{item_count} not found, add to queue."
+            f"modIds: {modIds} {mod_count}/{item_count} not found, add to queue."
         )
         trustable = False
     return TrustableResponse(
-        content=CurseforgeBaseResponse(data=mod_models),
+        # 不经过 CurseforgeBaseResponse，避免再校验一遍
+        content={"data": [mods[modId] for modId in modIds if modId in mods]},
         trustable=trustable,
     )
 
@@ -280,12 +320,63 @@ def convert_modloadertype(type_id: int) -> Optional[str]:
             return None
 
 
+# 文件按 _id 倒序分页
+MOD_FILES_SORT = [("_id", -1)]
+
+
+async def find_mod_files_page(
+    engine,
+    kind: str,
+    version: int,
+    match: dict,
+    index: int,
+    pageSize: int,
+    projection: Optional[Projection],
+) -> List[dict]:
+    """
+    从不超过 index 的最近分页边界开始，用 _id < 边界从索引定位，只跳过边界之后的文件；
+    按页顺序请求时不需要跳过，第 N 页与第 1 页开销相同
+
+    没有边界时先只读取 _id 跳过（不带 gameVersions 过滤时由 (modId, _id) 索引覆盖），再按 _id 取这一页
+    """
+    boundary_offset, boundary = await seek_cache.nearest(kind, version, index)
+    query = dict(match)
+    if boundary is not None:
+        query["_id"] = {"$lt": boundary}
+    skip = index - boundary_offset
+    if skip:
+        ids = [
+            doc["_id"]
+            for doc in await engine.get_collection(File)
+            .find(query, {"_id": 1}, sort=MOD_FILES_SORT, skip=skip, limit=pageSize)
+            .to_list(length=None)
+        ]
+        docs = {
+            doc["_id"]: doc
+            for doc in await reader.find(engine, File, {"_id": {"$in": ids}}, projection)
+        }
+        documents = [docs[file_id] for file_id in ids if file_id in docs]
+    else:
+        documents = await reader.find(
+            engine, File, query, projection, sort=MOD_FILES_SORT, limit=pageSize
+        )
+    if documents:
+        await seek_cache.save(
+            kind,
+            version,
+            index + len(documents),
+            documents[-1]["_id"],
+            expire=mcim_config.expire_second.curseforge.file,
+        )
+    return documents
+
+
 @v1_router.get(
     "/mods/{modId}/files",
     description="Curseforge Mod 文件信息",
     response_model=List[File],
 )
-@cache(expire=mcim_config.expire_second.curseforge.file)
+@cache(expire=mcim_config.expire_second.curseforge.file, stale_ttl=STALE_TTL)
 async def curseforge_mod_files(
     request: Request,
     modId: Annotated[int, Field(gt=30000, lt=9999999)],
@@ -293,8 +384,15 @@ async def curseforge_mod_files(
     modLoaderType: Optional[int] = None,
     index: Optional[int] = 0,
     pageSize: Optional[int] = 50,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    exclude: Optional[str] = Query(None, description=EXCLUDE_DESCRIPTION),
 ):
-    # 定义聚合管道
+    try:
+        # 分页边界需要 _id，exclude=id 时仍然查询，返回前去掉
+        projection = parse_projection(File, fields, exclude, required=["id"])
+    except ValueError as e:
+        return BadRequestResponse(str(e))
+
     match_conditions = {"modId": modId}
     gameVersionFilter = []
     if gameVersion:
@@ -305,55 +403,44 @@ async def curseforge_mod_files(
             gameVersionFilter.append(modLoaderType)
     if len(gameVersionFilter) != 0:
         match_conditions["gameVersions"] = {"$all": gameVersionFilter}
+    index = index if index else 0
+    if not pageSize or pageSize < 1:
+        return BadRequestResponse("pageSize must be positive")
+
+    engine = request.app.state.aio_mongo_engine
+    # 文件数由 sync 统计，不再每次 $count
+    counts = await file_counts.get(engine, modId)
+    result_count = counts.count(gameVersionFilter)
+
+    documents = []
+    if index < result_count:
+        documents = await find_mod_files_page(
+            engine,
+            kind=f"cf:mod_files:{modId}:{'|'.join(file_counts.filter_key(gameVersionFilter))}",
+            version=counts.version,
+            match=match_conditions,
+            index=index,
+            pageSize=pageSize,
+            projection=projection,
+        )
 
-    pipeline = [
-        {"$match": match_conditions},
-        {
-            "$facet": {
-                "resultCount": [
-                    {"$count": "count"},
-                ],
-                "totalCount": [
-                    {"$match": {"modId": modId}},
-                    {"$count": "count"},
-                ],
-                "documents": [
-                    {"$skip": index if index else 0},
-                    {"$limit": pageSize},
-                ],
-            }
-        },
-    ]
-
-    # 执行聚合查询
-    files_collection = request.app.state.aio_mongo_engine.get_collection(File)
-    result = await files_collection.aggregate(pipeline).to_list(length=None)
-
-    if not result or not result[0]["documents"]:
+    if not documents:
         await add_curseforge_modIds_to_queue(modIds=[modId])
         log.debug(f"modId: {modId} not found, add to queue.")
         return UncachedResponse()
 
-    total_count = result[0]["totalCount"][0]["count"]
-    result_count = result[0]["resultCount"][0]["count"]
-    documents = result[0]["documents"]
-
-    doc_results = []
-    for doc in documents:
-        _id = doc.pop("_id")
-        doc["id"] = _id
-        doc_results.append(doc)
-
     return TrustableResponse(
-        content=CurseforgePageBaseResponse(
-            data=doc_results,
-            pagination=Pagination(
+        # 不经过 CurseforgePageBaseResponse，预渲染的 RawJSON 直接拼接
+        content={
+            "data": [reader.render(File, doc, projection) for doc in documents],
+            "pagination": Pagination(
                 index=index,
                 pageSize=pageSize,
                 resultCount=result_count,
-                totalCount=total_count,
-            ),
-        )
+                totalCount=counts.total,
+            ).model_dump(),
+        },
+        cache_tags=[tags.cf_mod(modId)],
     )
 
 
@@ -367,24 +454,35 @@ class fileIds_item(BaseModel):
     description="Curseforge Mod 文件信息",
     response_model=CurseforgeBaseResponse,
 )
-# @cache(expire=mcim_config.expire_second.curseforge.file)
 async def curseforge_files(item: fileIds_item, request: Request):
     trustable = True
-    file_models: Optional[List[File]] = await request.app.state.aio_mongo_engine.find(
-        File, query.in_(File.id, item.fileIds)
-    )
-    if not file_models:
-        await add_curseforge_fileIds_to_queue(fileIds=item.fileIds)
+    fileIds = list(dict.fromkeys(item.fileIds))
+    files = await get_items("cf:file", fileIds)
+    missing_fileids = [fileId for fileId in fileIds if fileId not in files]
+    if missing_fileids:
+        file_models: List[File] = await request.app.state.aio_mongo_engine.find(
+            File, query.in_(File.id, missing_fileids)
+        )
+        found_files = {file.id: file.model_dump() for file in file_models}
+        await set_items(
+            "cf:file",
+            found_files,
+            expire=mcim_config.expire_second.curseforge.file,
+            tags=lambda _, file: [tags.cf_mod(file["modId"])],
+        )
+        files.update(found_files)
+    if not files:
+        await add_curseforge_fileIds_to_queue(fileIds=fileIds)
         return UncachedResponse()
-    elif len(file_models) != len(item.fileIds):
+    elif len(files) != len(fileIds):
         # 找到不存在的 fileid
-        not_match_fileids = list(
-            set(item.fileIds) - set([file.id for file in file_models])
-        )
+        not_match_fileids = [fileId for fileId in fileIds if fileId not in files]
         await add_curseforge_fileIds_to_queue(fileIds=not_match_fileids)
         trustable = False
     return TrustableResponse(
-        content=CurseforgeBaseResponse(data=file_models),
+        content=CurseforgeBaseResponse(
+            data=[files[fileId] for fileId in fileIds if fileId in files]
+        ),
         trustable=trustable,
     )
 
@@ -410,6 +508,7 @@ async def curseforge_mod_file(
     return TrustableResponse(
         content=CurseforgeBaseResponse(data=model),
         trustable=trustable,
+        cache_tags=[tags.cf_mod(modId)],
     )
 
 
@@ -439,51 +538,59 @@ class fingerprints_item(BaseModel):
     fingerprints: List[Annotated[int, Field(lt=99999999999)]]
 
 
-@v1_router.post(
-    "/fingerprints",
-    description="Curseforge Fingerprint 文件信息",
-    response_model=FingerprintResponse,
-)
-# @cache(expire=mcim_config.expire_second.curseforge.fingerprint)
-async def curseforge_fingerprints(item: fingerprints_item, request: Request):
+async def get_fingerprints(fingerprints: List[int], request: Request):
     trustable = True
-    fingerprints_models: List[Fingerprint] = (
-        await request.app.state.aio_mongo_engine.find(
-            Fingerprint, query.in_(Fingerprint.id, item.fingerprints)
+    fingerprints = list(dict.fromkeys(fingerprints))
+    # fingerprint -> 已替换 id 的 Fingerprint
+    matches = await get_items("cf:fingerprint", fingerprints)
+    missing_fingerprints = [
+        fingerprint for fingerprint in fingerprints if fingerprint not in matches
+    ]
+    if missing_fingerprints:
+        fingerprints_models: List[Fingerprint] = (
+            await request.app.state.aio_mongo_engine.find(
+                Fingerprint, query.in_(Fingerprint.id, missing_fingerprints)
+            )
         )
-    )
-    not_match_fingerprints = list(
-        set(item.fingerprints)
-        - set([fingerprint.id for fingerprint in fingerprints_models])
-    )
-    if not fingerprints_models:
-        await add_curseforge_fingerprints_to_queue(fingerprints=item.fingerprints)
+        found_matches = {}
+        for fingerprint_model in fingerprints_models:
+            # fingerprint_model.id = fingerprint_model.file.id
+            # 神奇 primary_key 不能修改，没辙只能这样了
+            fingerprint = fingerprint_model.model_dump()
+            fingerprint["id"] = fingerprint_model.file.id
+            found_matches[fingerprint_model.id] = fingerprint
+        await set_items(
+            "cf:fingerprint",
+            found_matches,
+            expire=mcim_config.expire_second.curseforge.fingerprint,
+            tags=lambda _, fingerprint: [tags.cf_mod(fingerprint["file"]["modId"])],
+        )
+        matches.update(found_matches)
+    not_match_fingerprints = [
+        fingerprint for fingerprint in fingerprints if fingerprint not in matches
+    ]
+    if not matches:
+        await add_curseforge_fingerprints_to_queue(fingerprints=fingerprints)
         trustable = False
         return TrustableResponse(
             content=CurseforgeBaseResponse(
-                data=FingerprintResponse(unmatchedFingerprints=item.fingerprints)
+                data=FingerprintResponse(unmatchedFingerprints=fingerprints)
             ).model_dump(),
             trustable=trustable,
         )
-    elif len(fingerprints_models) != len(item.fingerprints):
+    elif not_match_fingerprints:
         # 找到不存在的 fingerprint
         await add_curseforge_fingerprints_to_queue(fingerprints=not_match_fingerprints)
         trustable = False
-    exactFingerprints = []
-    result_fingerprints_models = []
-    for fingerprint_model in fingerprints_models:
-        # fingerprint_model.id = fingerprint_model.file.id
-        # 神奇 primary_key 不能修改，没辙只能这样了
-        fingerprint = fingerprint_model.model_dump()
-        fingerprint["id"] = fingerprint_model.file.id
-        result_fingerprints_models.append(fingerprint)
-        exactFingerprints.append(fingerprint_model.id)
+    exactFingerprints = [
+        fingerprint for fingerprint in fingerprints if fingerprint in matches
+    ]
     return TrustableResponse(
         content=CurseforgeBaseResponse(
             data=FingerprintResponse(
                 isCacheBuilt=True,
                 exactFingerprints=exactFingerprints,
-                exactMatches=result_fingerprints_models,
+                exactMatches=[matches[fingerprint] for fingerprint in exactFingerprints],
                 unmatchedFingerprints=not_match_fingerprints,
                 installedFingerprints=[],
             ).model_dump()
@@ -492,56 +599,22 @@ async def curseforge_fingerprints(item: fingerprints_item, request: Request):
     )
 
 
+@v1_router.post(
+    "/fingerprints",
+    description="Curseforge Fingerprint 文件信息",
+    response_model=FingerprintResponse,
+)
+async def curseforge_fingerprints(item: fingerprints_item, request: Request):
+    return await get_fingerprints(item.fingerprints, request)
+
+
 @v1_router.post(
     "/fingerprints/432",
     description="Curseforge Fingerprint 文件信息",
     response_model=FingerprintResponse,
 )
-# @cache(expire=mcim_config.expire_second.curseforge.fingerprint)
 async def curseforge_fingerprints_432(item: fingerprints_item, request: Request):
-    trustable = True
-    fingerprints_models: List[Fingerprint] = (
-        await request.app.state.aio_mongo_engine.find(
-            Fingerprint, query.in_(Fingerprint.id, item.fingerprints)
-        )
-    )
-    not_match_fingerprints = list(
-        set(item.fingerprints)
-        - set([fingerprint.id for fingerprint in fingerprints_models])
-    )
-    if not fingerprints_models:
-        await add_curseforge_fingerprints_to_queue(fingerprints=item.fingerprints)
-        trustable = False
-        return TrustableResponse(
-            content=CurseforgeBaseResponse(
-                data=FingerprintResponse(unmatchedFingerprints=item.fingerprints)
-            ).model_dump(),
-            trustable=trustable,
-        )
-    elif len(fingerprints_models) != len(item.fingerprints):
-        await add_curseforge_fingerprints_to_queue(fingerprints=not_match_fingerprints)
-        trustable = False
-    exactFingerprints = []
-    result_fingerprints_models = []
-    for fingerprint_model in fingerprints_models:
-        # fingerprint_model.id = fingerprint_model.file.id
-        # 神奇 primary_key 不能修改，没辙只能这样了
-        fingerprint = fingerprint_model.model_dump()
-        fingerprint["id"] = fingerprint_model.file.id
-        result_fingerprints_models.append(fingerprint)
-        exactFingerprints.append(fingerprint_model.id)
-    return TrustableResponse(
-        content=CurseforgeBaseResponse(
-            data=FingerprintResponse(
-                isCacheBuilt=True,
-                exactFingerprints=exactFingerprints,
-                exactMatches=result_fingerprints_models,
-                unmatchedFingerprints=not_match_fingerprints,
-                installedFingerprints=[],
-            ).model_dump()
-        ),
-        trustable=trustable,
-    )
+    return await get_fingerprints(item.fingerprints, request)
 
 
 @v1_router.get(
@@ -549,7 +622,7 @@ async def curseforge_fingerprints_432(item: fingerprints_item, request: Request)
     description="Curseforge Categories 信息",
     response_model=List[Category],
 )
-@cache(expire=mcim_config.expire_second.curseforge.categories)
+@cache(expire=mcim_config.expire_second.curseforge.categories, l1=True)
 async def curseforge_categories(request: Request):
     categories = await request.app.state.aio_redis_engine.hget(
         "curseforge", "categories"
@@ -11,7 +11,7 @@ from app.models.database.modrinth import File as mrFile
 from app.models.database.file_cdn import File as cdnFile
 from app.config import MCIMConfig
 from app.utils.loger import log
-from app.utils.response_cache import cache
+from app.utils.response_cache import cache, tags
 from app.utils.response import BaseResponse
 from app.utils.network import ResponseCodeException
 from app.utils.network import request as request_async
@@ -84,7 +84,8 @@ if mcim_config.file_cdn:
             _93ATHOME_MAX_AGE
             if FILE_CDN_REDIRECT_MODE == FileCDNRedirectMode.ORIGIN
             else MAX_AGE
-        )
+        ),
+        l1=True,
     )
     async def get_modrinth_file(
         project_id: str, version_id: str, file_name: str, request: Request
@@ -92,11 +93,13 @@ if mcim_config.file_cdn:
         def return_origin_response():
             url = f"https://cdn.modrinth.com/data/{project_id}/versions/{version_id}/{file_name}"
             FILE_CDN_FORWARD_TO_ORIGIN_COUNT.labels("modrinth").inc()
-            return RedirectResponse(
+            response = RedirectResponse(
                 url=url,
                 headers={"Cache-Control": f"public, age={3600*24*1}"},
                 status_code=302,
             )
+            response.cache_tags = [tags.mr_project(project_id)]
+            return response
 
         async def return_open93home_response(sha1: str, request: Request):
             file_cdn_model: Optional[cdnFile] = (
@@ -105,11 +108,13 @@ if mcim_config.file_cdn:
                 )
             )
             if file_cdn_model:
-                return RedirectResponse(
+                response = RedirectResponse(
                     url=f"{mcim_config.open93home_endpoint}/{file_cdn_model.path}",
                     headers={"Cache-Control": f"public, age={3600*24*7}"},
                     status_code=301,
                 )
+                response.cache_tags = [tags.mr_project(project_id)]
+                return response
 
         file: Optional[mrFile] = await request.app.state.aio_mongo_engine.find_one(
             mrFile,
@@ -149,7 +154,8 @@ if mcim_config.file_cdn:
             _93ATHOME_MAX_AGE
             if FILE_CDN_REDIRECT_MODE == FileCDNRedirectMode.ORIGIN
             else MAX_AGE
-        )
+        ),
+        l1=True,
     )
     async def get_curseforge_file(
         fileid1: int, fileid2: int, file_name: str, request: Request
@@ -157,11 +163,13 @@ if mcim_config.file_cdn:
         def return_origin_response():
             url = f"https://edge.forgecdn.net/files/{fileid1}/{fileid2}/{file_name}"
             FILE_CDN_FORWARD_TO_ORIGIN_COUNT.labels("curseforge").inc()
-            return RedirectResponse(
+            response = RedirectResponse(
                 url=url,
                 headers={"Cache-Control": f"public, age={3600*24*7}"},
                 status_code=302,
             )
+            response.cache_tags = [tags.cf_file(fileid)]
+            return response
 
         async def return_open93home_response(sha1: str, request: Request):
             file_cdn_model: Optional[cdnFile] = (
@@ -170,11 +178,13 @@ if mcim_config.file_cdn:
                 )
             )
             if file_cdn_model:
-                return RedirectResponse(
+                response = RedirectResponse(
                     url=f"{mcim_config.open93home_endpoint}/{file_cdn_model.path}",
                     headers={"Cache-Control": f"public, age={3600*24*7}"},
                     status_code=301,
                 )
+                response.cache_tags = [tags.cf_file(fileid)]
+                return response
 
         fileid = int(f"{fileid1}{fileid2}")
         file: Optional[cfFile] = await request.app.state.aio_mongo_engine.find_one(
@@ -6,6 +6,7 @@ from odmantic import query
 import json
 import time
 import re
+import hashlib
 from datetime import datetime
 
 from app.sync import *
@@ -22,18 +23,34 @@ from app.utils.response import (
     UncachedResponse,
     ForceSyncResponse,
     BaseResponse,
+    BadRequestResponse,
+    StreamingJSONResponse,
 )
+from app.utils.response.negotiation import JSON, get_response_format
 from app.utils.network import request as request_async
 from app.utils.loger import log
 from app.utils.response_cache import cache
+from app.utils.response_cache.item_cache import get_items, set_items
+from app.utils.response_cache import tags
+from app.utils.projection import Projection, parse_projection
+from app.database import reader
+from app.utils import latest_version
+
+FIELDS_DESCRIPTION = "只返回这些字段，逗号分隔，支持 files.hashes 形式的嵌套字段"
+EXCLUDE_DESCRIPTION = "不返回这些字段，逗号分隔，不能与 fields 同时使用"
 
 mcim_config = MCIMConfig.load()
 
+streaming_config = mcim_config.streaming
+
 API = mcim_config.modrinth_api
 v2_router = APIRouter(prefix="/v2", tags=["modrinth"])
 
 SEARCH_TIMEOUT = 3
 
+# 过期后继续返回旧值并后台刷新的时间
+STALE_TTL = 3600
+
 
 class ModrinthStatistics(BaseModel):
     projects: int
@@ -68,19 +85,40 @@ async def modrinth_statistics(request: Request):
     description="Modrinth Project 信息",
     response_model=Project,
 )
-@cache(expire=mcim_config.expire_second.modrinth.project)
-async def modrinth_project(request: Request, idslug: str):
+@cache(expire=mcim_config.expire_second.modrinth.project, l1=True)
+async def modrinth_project(
+    request: Request,
+    idslug: str,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    exclude: Optional[str] = Query(None, description=EXCLUDE_DESCRIPTION),
+):
     trustable = True
-    model: Optional[Project] = await request.app.state.aio_mongo_engine.find_one(
-        Project, query.or_(Project.id == idslug, Project.slug == idslug)
+    try:
+        projection = parse_projection(
+            Project, fields, exclude, required=["id", "found"]
+        )
+    except ValueError as e:
+        return BadRequestResponse(str(e))
+    # 直接查原始文档，指定了字段时只取需要的字段
+    doc = await reader.find_one(
+        request.app.state.aio_mongo_engine,
+        Project,
+        {"$or": [{"_id": idslug}, {"slug": idslug}]},
+        projection,
+        fields=["found"],
     )
-    if model is None:
+    if doc is None:
         await add_modrinth_project_ids_to_queue(project_ids=[idslug])
         log.debug(f"Project {idslug} not found, add to queue.")
         return UncachedResponse()
-    elif model.found == False:
+    elif doc.get("found") == False:
         return UncachedResponse()
-    return TrustableResponse(content=model.model_dump(), trustable=trustable)
+    project_id = doc["_id"]
+    return TrustableResponse(
+        content=reader.render(Project, doc, projection),
+        trustable=trustable,
+        cache_tags=[tags.mr_project(project_id)],
+    )
 
 
 @v2_router.get(
@@ -117,7 +155,9 @@ async def modrinth_projects(ids: str, request: Request):
         )
         trustable = False
     return TrustableResponse(
-        content=[model.model_dump() for model in models], trustable=trustable
+        content=[model.model_dump() for model in models],
+        trustable=trustable,
+        cache_tags=[tags.mr_project(model.id) for model in models],
     )
 
 
@@ -126,36 +166,59 @@ async def modrinth_projects(ids: str, request: Request):
     description="Modrinth Projects 全部版本信息",
     response_model=List[Project],
 )
-@cache(expire=mcim_config.expire_second.modrinth.version)
-async def modrinth_project_versions(idslug: str, request: Request):
+@cache(expire=mcim_config.expire_second.modrinth.version, stale_ttl=STALE_TTL)
+async def modrinth_project_versions(
+    idslug: str,
+    request: Request,
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION),
+    exclude: Optional[str] = Query(None, description=EXCLUDE_DESCRIPTION),
+):
     """
     先查 Project 的 Version 列表再拉取...避免遍历整个 Version 表
     """
     trustable = True
-    project_model: Optional[Project] = (
-        await request.app.state.aio_mongo_engine.find_one(
-            Project, query.or_(Project.id == idslug, Project.slug == idslug)
-        )
+    try:
+        projection = parse_projection(Version, fields, exclude)
+    except ValueError as e:
+        return BadRequestResponse(str(e))
+    engine = request.app.state.aio_mongo_engine
+    # 只需要 Project 的 versions
+    project_doc = await reader.find_one(
+        engine,
+        Project,
+        {"$or": [{"_id": idslug}, {"slug": idslug}]},
+        Projection({"versions"}, set()),
     )
-    if not project_model:
+    if not project_doc:
         await add_modrinth_project_ids_to_queue(project_ids=[idslug])
         log.debug(f"Project {idslug} not found, add to queue.")
         return UncachedResponse()
     else:
-        version_list = project_model.versions
-        version_model_list: Optional[List[Version]] = (
-            await request.app.state.aio_mongo_engine.find(
-                Version, query.in_(Version.id, version_list)
+        project_id = project_doc["_id"]
+        version_list = project_doc.get("versions") or []
+        version_query = {"_id": {"$in": version_list}}
+        if (
+            len(version_list) >= streaming_config.min_items
+            and get_response_format() == JSON
+        ):
+            # 版本很多时逐批读取游标并流式输出，不一次性加载全部 Version
+            return StreamingJSONResponse(
+                items=reader.iterate(
+                    engine,
+                    Version,
+                    version_query,
+                    projection,
+                    batch_size=streaming_config.batch_size,
+                ),
+                trustable=trustable,
+                chunk_size=streaming_config.chunk_size,
+                cache_tags=[tags.mr_project(project_id)],
             )
-        )
-
+        docs = await reader.find(engine, Version, version_query, projection)
         return TrustableResponse(
-            content=(
-                [version.model_dump() for version in version_model_list]
-                if version_model_list
-                else []
-            ),
+            content=[reader.render(Version, doc, projection) for doc in docs],
             trustable=trustable,
+            cache_tags=[tags.mr_project(project_id)],
         )
 
 
@@ -196,7 +259,7 @@ class SearchIndex(str, Enum):
     description="Modrinth Projects 搜索",
     # TODO: response_model
 )
-@cache(expire=mcim_config.expire_second.modrinth.search)
+@cache(expire=mcim_config.expire_second.modrinth.search, stale_ttl=STALE_TTL)
 async def modrinth_search_projects(
     request: Request,
     query: Optional[str] = None,
@@ -243,7 +306,11 @@ async def modrinth_version(
         return UncachedResponse()
     elif model.found == False:
         return UncachedResponse()
-    return TrustableResponse(content=model.model_dump(), trustable=trustable)
+    return TrustableResponse(
+        content=model.model_dump(),
+        trustable=trustable,
+        cache_tags=[tags.mr_project(model.project_id)],
+    )
 
 
 @v2_router.get(
@@ -255,8 +322,11 @@ async def modrinth_version(
 async def modrinth_versions(ids: str, request: Request):
     trustable = True
     ids_list = json.loads(ids)
-    models: List[Version] = await request.app.state.aio_mongo_engine.find(
-        Version, query.and_(query.in_(Version.id, ids_list), Version.found == True)
+    models: List[dict] = await reader.find(
+        request.app.state.aio_mongo_engine,
+        Version,
+        {"_id": {"$in": ids_list}, "found": True},
+        fields=["project_id"],
     )
     models_count = len(models)
     ids_count = len(ids_list)
@@ -271,7 +341,9 @@ async def modrinth_versions(ids: str, request: Request):
         )
         trustable = False
     return TrustableResponse(
-        content=[model.model_dump() for model in models], trustable=trustable
+        content=[reader.render(Version, model) for model in models],
+        trustable=trustable,
+        cache_tags=list(set(tags.mr_project(model["project_id"]) for model in models)),
     )
 
 
@@ -317,7 +389,11 @@ async def modrinth_file(
         log.debug(f"Version {file.version_id} not found, add to queue.")
         return UncachedResponse()
 
-    return TrustableResponse(content=version, trustable=trustable)
+    return TrustableResponse(
+        content=version,
+        trustable=trustable,
+        cache_tags=[tags.mr_project(version.project_id)],
+    )
 
 
 class HashesQuery(BaseModel):
@@ -330,87 +406,142 @@ class HashesQuery(BaseModel):
     description="Modrinth Files 信息",
     response_model=Dict[str, Version],
 )
-# @cache(expire=mcim_config.expire_second.modrinth.file)
 async def modrinth_files(items: HashesQuery, request: Request):
     trustable = True
-    # ignore algo
-    files_models: List[File] = await request.app.state.aio_mongo_engine.find(
-        File,
-        query.and_(
-            (
-                query.in_(File.hashes.sha1, items.hashes)
-                if items.algorithm == Algorithm.sha1
-                else query.in_(File.hashes.sha512, items.hashes)
+    hashes = list(dict.fromkeys(items.hashes))
+    kind = f"mr:version_file:{items.algorithm.value}"
+    # 先查单项缓存，hash -> Version
+    versions = await get_items(kind, hashes)
+    missing_hashes = [hash_ for hash_ in hashes if hash_ not in versions]
+    if missing_hashes:
+        files_models: List[File] = await request.app.state.aio_mongo_engine.find(
+            File,
+            query.and_(
+                (
+                    query.in_(File.hashes.sha1, missing_hashes)
+                    if items.algorithm == Algorithm.sha1
+                    else query.in_(File.hashes.sha512, missing_hashes)
+                ),
+                File.found == True,
             ),
-            File.found == True,
-        ),
-    )
-    model_count = len(files_models)
-    hashes_count = len(items.hashes)
-    if not files_models:
-        await add_modrinth_hashes_to_queue(
-            items.hashes, algorithm=items.algorithm.value
         )
-        log.debug("Files not found, add to queue.")
-        return UncachedResponse()
-    elif model_count != hashes_count:
+        hash_version_ids = {
+            (
+                file.hashes.sha1
+                if items.algorithm == Algorithm.sha1
+                else file.hashes.sha512
+            ): file.version_id
+            for file in files_models
+        }
         # 找出未找到的文件
-        not_found_hashes = list(
-            set(items.hashes)
-            - set(
-                [
-                    (
-                        file.hashes.sha1
-                        if items.algorithm == Algorithm.sha1
-                        else file.hashes.sha512
-                    )
-                    for file in files_models
-                ]
-            )
-        )
+        not_found_hashes = [
+            hash_ for hash_ in missing_hashes if hash_ not in hash_version_ids
+        ]
         if not_found_hashes:
             await add_modrinth_hashes_to_queue(
                 not_found_hashes, algorithm=items.algorithm.value
             )
             log.debug(
-                f"Files {not_found_hashes} {len(not_found_hashes)}/{hashes_count} not completely found, add to queue."
+                f"Files {not_found_hashes} {len(not_found_hashes)}/{len(hashes)} not completely found, add to queue."
             )
             trustable = False
 
-    version_ids = [file.version_id for file in files_models]
-    version_models: List[Version] = await request.app.state.aio_mongo_engine.find(
-        Version, query.in_(Version.id, version_ids)
-    )
-
-    version_model_count = len(version_models)
-    file_model_count = len(files_models)
-    if not version_models:
-        # 一个版本都没找到，直接重新同步
-        await add_modrinth_version_ids_to_queue(version_ids=version_ids)
-        log.debug("Versions not found, add to queue.")
-        return UncachedResponse()
-    elif version_model_count != file_model_count:
-        # 找出未找到的版本
-        not_found_version_ids = list(
-            set(version_ids) - set([version.id for version in version_models])
-        )
-        if not_found_version_ids:
-            await add_modrinth_version_ids_to_queue(version_ids=not_found_version_ids)
-            log.debug(
-                f"Versions {not_found_version_ids} {len(not_found_version_ids)}/{file_model_count} not completely found, add to queue."
+        if hash_version_ids:
+            version_ids = list(set(hash_version_ids.values()))
+            version_models: List[Version] = (
+                await request.app.state.aio_mongo_engine.find(
+                    Version, query.in_(Version.id, version_ids)
+                )
             )
-            trustable = False
-    result = {}
-    for version in version_models:
-        result[
-            (
-                version.files[0].hashes.sha1
-                if items.algorithm == Algorithm.sha1
-                else version.files[0].hashes.sha2
+            version_dicts = {version.id: version.model_dump() for version in version_models}
+            # 找出未找到的版本
+            not_found_version_ids = [
+                version_id for version_id in version_ids if version_id not in version_dicts
+            ]
+            if not_found_version_ids:
+                await add_modrinth_version_ids_to_queue(
+                    version_ids=not_found_version_ids
+                )
+                log.debug(
+                    f"Versions {not_found_version_ids} {len(not_found_version_ids)}/{len(version_ids)} not completely found, add to queue."
+                )
+                trustable = False
+            found_versions = {
+                hash_: version_dicts[version_id]
+                for hash_, version_id in hash_version_ids.items()
+                if version_id in version_dicts
+            }
+            await set_items(
+                kind,
+                found_versions,
+                expire=mcim_config.expire_second.modrinth.file,
+                tags=lambda _, version: [tags.mr_project(version["project_id"])],
             )
-        ] = version.model_dump()
+            versions.update(found_versions)
 
-    return TrustableResponse(content=result, trustable=trustable)
+    if not versions:
+        return UncachedResponse()
+
+    return TrustableResponse(
+        content={hash_: versions[hash_] for hash_ in hashes if hash_ in versions},
+        trustable=trustable,
+    )
+
+
+def is_sync_expired(sync_at: Union[str, datetime]) -> bool:
+    # 聚合查询拿到的是 datetime，单项缓存里是字符串
+    if isinstance(sync_at, str):
+        sync_at = datetime.fromisoformat(sync_at).replace(tzinfo=None)
+    return sync_at.timestamp() + mcim_config.expire_second.modrinth.file <= time.time()
+
+
+async def find_file_project_ids(
+    request: Request, hashes: List[str], algorithm: Algorithm
+) -> Dict[str, str]:
+    """
+    hash -> project_id
+    """
+    field = "_id.sha1" if algorithm is Algorithm.sha1 else "_id.sha512"
+    match = {field: {"$in": hashes}}
+    if algorithm is Algorithm.sha1:
+        match["found"] = True
+    files_collection = request.app.state.aio_mongo_engine.get_collection(File)
+    docs = await files_collection.find(
+        match, {field: 1, "project_id": 1}
+    ).to_list(length=None)
+    return {
+        doc["_id"][algorithm.value]: doc["project_id"]
+        for doc in docs
+        if doc.get("project_id")
+    }
+
+
+async def find_latest_versions(
+    request: Request,
+    project_ids: List[str],
+    loaders: Optional[List[str]],
+    game_versions: Optional[List[str]],
+) -> Dict[str, dict]:
+    """
+    project_id -> 匹配任一 loader 和任一 game_version 的最新 Version 原始文档，
+    从最新版本表中按索引查询，见 app/utils/latest_version
+    """
+    engine = request.app.state.aio_mongo_engine
+    latest = await latest_version.find_latest(engine, project_ids, loaders, game_versions)
+    if not latest:
+        return {}
+    docs = await reader.find(
+        engine,
+        Version,
+        {"_id": {"$in": list(set(latest.values()))}},
+        fields=["project_id", "sync_at"],
+    )
+    version_docs = {doc["_id"]: doc for doc in docs}
+    return {
+        project_id: version_docs[version_id]
+        for project_id, version_id in latest.items()
+        if version_id in version_docs
+    }
 
 
 class UpdateItems(BaseModel):
@@ -427,54 +558,22 @@ async def modrinth_file_update(
     algorithm: Optional[Algorithm] = Algorithm.sha1,
 ):
     trustable = True
-    files_collection = request.app.state.aio_mongo_engine.get_collection(File)
-    pipeline = [
-        (
-            {"$match": {"_id.sha1": hash_, "found": True}}
-            if algorithm is Algorithm.sha1
-            else {"$match": {"_id.sha512": hash_}}
-        ),
-        {
-            "$project": (
-                {"_id.sha1": 1, "project_id": 1}
-                if algorithm is Algorithm.sha1
-                else {"_id.sha512": 1, "project_id": 1}
-            )
-        },
-        {
-            "$lookup": {
-                "from": "modrinth_versions",
-                "localField": "project_id",
-                "foreignField": "project_id",
-                "as": "versions_fields",
-            }
-        },
-        {"$unwind": "$versions_fields"},
-        {
-            "$match": {
-                "versions_fields.game_versions": {"$in": items.game_versions},
-                "versions_fields.loaders": {"$in": items.loaders},
-            }
-        },
-        {"$sort": {"versions_fields.date_published": -1}},
-        {"$replaceRoot": {"newRoot": "$versions_fields"}},
-    ]
-    version_result = await files_collection.aggregate(pipeline).to_list(length=None)
-    if len(version_result) != 0:
-        version_result = version_result[0]
-        if not (
-            datetime.strptime(
-                version_result["sync_at"], "%Y-%m-%dT%H:%M:%SZ"
-            ).timestamp()
-            + mcim_config.expire_second.modrinth.file
-            > time.time()
-        ):
-            trustable = False
-    else:
+    project_ids = await find_file_project_ids(request, [hash_], algorithm)
+    versions = await find_latest_versions(
+        request, list(project_ids.values()), items.loaders, items.game_versions
+    )
+    if not versions:
         await add_modrinth_hashes_to_queue([hash_], algorithm=algorithm.value)
         log.debug(f"Hash {hash_} not found, send sync task")
         return UncachedResponse()
-    return TrustableResponse(content=version_result, trustable=trustable)
+    version_doc = versions[project_ids[hash_]]
+    if is_sync_expired(version_doc["sync_at"]):
+        trustable = False
+    return TrustableResponse(
+        content=reader.render(Version, version_doc),
+        trustable=trustable,
+        cache_tags=[tags.mr_project(version_doc["project_id"])],
+    )
 
 
 class MultiUpdateItems(BaseModel):
@@ -485,83 +584,66 @@ class MultiUpdateItems(BaseModel):
 
 
 @v2_router.post("/version_files/update")
-# @cache(expire=mcim_config.expire_second.modrinth.file)
 async def modrinth_mutil_file_update(request: Request, items: MultiUpdateItems):
     trustable = True
-    files_collection = request.app.state.aio_mongo_engine.get_collection(File)
-    pipeline = [
-        (
-            {"$match": {"_id.sha1": {"$in": items.hashes}, "found": True}}
-            if items.algorithm is Algorithm.sha1
-            else {"$match": {"_id.sha512": {"$in": items.hashes}}}
-        ),
-        {
-            "$project": (
-                {"_id.sha1": 1, "project_id": 1}
-                if items.algorithm is Algorithm.sha1
-                else {"_id.sha512": 1, "project_id": 1}
-            )
-        },
-        {
-            "$lookup": {
-                "from": "modrinth_versions",
-                "localField": "project_id",
-                "foreignField": "project_id",
-                "as": "versions_fields",
-            }
-        },
-        {"$unwind": "$versions_fields"},
-        {
-            "$match": {
-                "versions_fields.game_versions": {"$in": items.game_versions},
-                "versions_fields.loaders": {"$in": items.loaders},
-            }
-        },
-        {"$sort": {"versions_fields.date_published": -1}},
-        {
-            "$group": {
-                "_id": (
-                    "$_id.sha1" if items.algorithm is Algorithm.sha1 else "$_id.sha512"
-                ),
-                "latest_date": {"$first": "$versions_fields.date_published"},
-                "detail": {"$first": "$versions_fields"},  # 只保留第一个匹配版本
-            }
-        },
-    ]
-    versions_result = await files_collection.aggregate(pipeline).to_list(length=None)
-    if len(versions_result) == 0:
-        await add_modrinth_hashes_to_queue(
-            items.hashes, algorithm=items.algorithm.value
+    hashes = list(dict.fromkeys(items.hashes))
+    # 结果还取决于 loaders 和 game_versions
+    filter_hash = hashlib.md5(
+        json.dumps([items.loaders, items.game_versions], sort_keys=True).encode()
+    ).hexdigest()
+    kind = f"mr:latest_version:{items.algorithm.value}:{filter_hash}"
+    resp = await get_items(kind, hashes)
+    # hash -> sync_at，用于判断是否过期
+    sync_ats = {hash_: version["sync_at"] for hash_, version in resp.items()}
+    missing_hashes = [hash_ for hash_ in hashes if hash_ not in resp]
+    if missing_hashes:
+        project_ids = await find_file_project_ids(
+            request, missing_hashes, items.algorithm
+        )
+        versions = await find_latest_versions(
+            request,
+            list(set(project_ids.values())),
+            items.loaders,
+            items.game_versions,
         )
-        log.debug(f"Hashes {items.hashes} not found, send sync task")
+        found_docs = {
+            hash_: versions[project_id]
+            for hash_, project_id in project_ids.items()
+            if project_id in versions
+        }
+        found_versions = {
+            hash_: reader.render(Version, doc) for hash_, doc in found_docs.items()
+        }
+        await set_items(
+            kind,
+            found_versions,
+            expire=mcim_config.expire_second.modrinth.file,
+            tags=lambda hash_, _: [tags.mr_project(project_ids[hash_])],
+        )
+        resp.update(found_versions)
+        sync_ats.update({hash_: doc["sync_at"] for hash_, doc in found_docs.items()})
+
+    if not resp:
+        await add_modrinth_hashes_to_queue(hashes, algorithm=items.algorithm.value)
+        log.debug(f"Hashes {hashes} not found, send sync task")
         return UncachedResponse()
-    elif len(versions_result) != len(items.hashes):
+    elif len(resp) != len(hashes):
         # 找出未找到的文件
-        not_found_hashes = list(
-            set(items.hashes) - set([version["_id"] for version in versions_result])
+        not_found_hashes = [hash_ for hash_ in hashes if hash_ not in resp]
+        await add_modrinth_hashes_to_queue(
+            not_found_hashes, algorithm=items.algorithm.value
         )
-        if not_found_hashes:
-            await add_modrinth_hashes_to_queue(
-                not_found_hashes, algorithm=items.algorithm.value
-            )
-            log.debug(f"Hashes {not_found_hashes} not completely found, add to queue.")
+        log.debug(f"Hashes {not_found_hashes} not completely found, add to queue.")
+        trustable = False
+
+    # check expire
+    for sync_at in sync_ats.values():
+        if is_sync_expired(sync_at):
             trustable = False
-    else:
-        # check expire
-        resp = {}
-        for version_result in versions_result:
-            original_hash = version_result["_id"]
-            version_detail = version_result["detail"]
-            resp[original_hash] = version_detail
-            if not (
-                datetime.strptime(
-                    version_detail["sync_at"], "%Y-%m-%dT%H:%M:%SZ"
-                ).timestamp()
-                + mcim_config.expire_second.modrinth.file
-                > time.time()
-            ):
-                trustable = False
-        return TrustableResponse(content=resp, trustable=trustable)
+    return TrustableResponse(
+        content={hash_: resp[hash_] for hash_ in hashes if hash_ in resp},
+        trustable=trustable,
+    )
 
 
 @v2_router.get(
@@ -569,7 +651,7 @@ async def modrinth_mutil_file_update(request: Request, items: MultiUpdateItems):
     description="Modrinth Category 信息",
     response_model=List,
 )
-@cache(expire=mcim_config.expire_second.modrinth.category)
+@cache(expire=mcim_config.expire_second.modrinth.category, l1=True)
 async def modrinth_tag_categories(request: Request):
     category = await request.app.state.aio_redis_engine.hget("modrinth", "categories")
     if category is None:
@@ -586,7 +668,7 @@ async def modrinth_tag_categories(request: Request):
     description="Modrinth Loader 信息",
     response_model=List,
 )
-@cache(expire=mcim_config.expire_second.modrinth.category)
+@cache(expire=mcim_config.expire_second.modrinth.category, l1=True)
 async def modrinth_tag_loaders(request: Request):
     loader = await request.app.state.aio_redis_engine.hget("modrinth", "loaders")
     if loader is None:
@@ -601,7 +683,7 @@ async def modrinth_tag_loaders(request: Request):
     description="Modrinth Game Version 信息",
     response_model=List,
 )
-@cache(expire=mcim_config.expire_second.modrinth.category)
+@cache(expire=mcim_config.expire_second.modrinth.category, l1=True)
 async def modrinth_tag_game_versions(request: Request):
     game_version = await request.app.state.aio_redis_engine.hget(
         "modrinth", "game_versions"
@@ -620,7 +702,7 @@ async def modrinth_tag_game_versions(request: Request):
     description="Modrinth Donation Platform 信息",
     response_model=List,
 )
-@cache(expire=mcim_config.expire_second.modrinth.category)
+@cache(expire=mcim_config.expire_second.modrinth.category, l1=True)
 async def modrinth_tag_donation_platforms(request: Request):
     donation_platform = await request.app.state.aio_redis_engine.hget(
         "modrinth", "donation_platform"
@@ -639,7 +721,7 @@ async def modrinth_tag_donation_platforms(request: Request):
     description="Modrinth Project Type 信息",
     response_model=List,
 )
-@cache(expire=mcim_config.expire_second.modrinth.category)
+@cache(expire=mcim_config.expire_second.modrinth.category, l1=True)
 async def modrinth_tag_project_types(request: Request):
     project_type = await request.app.state.aio_redis_engine.hget(
         "modrinth", "project_type"
@@ -658,7 +740,7 @@ async def modrinth_tag_project_types(request: Request):
     description="Modrinth Side Type 信息",
     response_model=List,
 )
-@cache(expire=mcim_config.expire_second.modrinth.category)
+@cache(expire=mcim_config.expire_second.modrinth.category, l1=True)
 async def modrinth_tag_side_types(request: Request):
     side_type = await request.app.state.aio_redis_engine.hget("modrinth", "side_type")
     if side_type is None:
@@ -0,0 +1,147 @@
+"""
+索引注册表
+
+Model 上 Field(index=True) 只能建单字段索引，且嵌入主键（modrinth File.hashes）的字段无法声明；
+查询需要的索引统一在这里声明，启动时由 setup_async_mongodb 创建：唯一索引在开始服务前创建，
+避免并发 upsert 写入重复文档导致建索引失败，其余在后台创建；
+也可以用 python -m scripts.manage_indexes 手动查看、创建
+
+新增查询时在这里补充索引，并用 python -m scripts.check_query_plans 确认没有 COLLSCAN
+"""
+
+import asyncio
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, Type
+
+from odmantic import AIOEngine, Model, SyncEngine
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+from app.models.database.curseforge import File
+from app.models.database.modrinth import Version, File as ModrinthFile, LatestVersion
+from app.models.database.file_cdn import File as CDNFile
+from app.utils.loger import log
+
+
+class IndexSpec(NamedTuple):
+    model: Type[Model]
+    keys: Sequence[Tuple[str, int]]
+    name: str
+    unique: bool = False
+
+    def to_index_model(self) -> IndexModel:
+        # background 在 MongoDB 4.2 之后被忽略，新版本总是使用优化过的后台构建
+        return IndexModel(
+            list(self.keys), name=self.name, unique=self.unique, background=True
+        )
+
+
+INDEXES: List[IndexSpec] = [
+    # CurseForge
+    # /v1/mods/{modId}/files 按 _id 倒序分页，可选 gameVersions 过滤
+    IndexSpec(File, [("modId", ASCENDING), ("_id", DESCENDING)], "modId_id"),
+    IndexSpec(
+        File,
+        [("modId", ASCENDING), ("gameVersions", ASCENDING), ("_id", DESCENDING)],
+        "modId_gameVersions_id",
+    ),
+    # Modrinth
+    # /v2/version_file/{hash}、/v2/version_files 按 hash 查询，主键是 {sha512, sha1}
+    IndexSpec(ModrinthFile, [("_id.sha1", ASCENDING)], "hashes_sha1"),
+    IndexSpec(ModrinthFile, [("_id.sha512", ASCENDING)], "hashes_sha512"),
+    # file_cdn /data/{project_id}/versions/{version_id}/{file_name}
+    IndexSpec(
+        ModrinthFile,
+        [("project_id", ASCENDING), ("version_id", ASCENDING), ("filename", ASCENDING)],
+        "project_id_version_id_filename",
+    ),
+    IndexSpec(ModrinthFile, [("version_id", ASCENDING)], "version_id"),
+    # 补建最新版本表时按 project_id 读取，/v2/project/{id}/version 按发布时间排序
+    IndexSpec(
+        Version,
+        [("project_id", ASCENDING), ("date_published", DESCENDING)],
+        "project_id_date_published",
+    ),
+    # version_file update 按 (project_id, loader, game_version) 查询最新版本，见 app/utils/latest_version
+    IndexSpec(
+        LatestVersion,
+        [("project_id", ASCENDING), ("loader", ASCENDING), ("game_version", ASCENDING)],
+        "project_id_loader_game_version",
+        unique=True,
+    ),
+    # File CDN /file_cdn/list 增量拉取
+    IndexSpec(CDNFile, [("mtime", ASCENDING), ("_id", ASCENDING)], "mtime_id"),
+]
+
+_build_task: Optional[asyncio.Task] = None
+
+
+def unique_indexes() -> List[IndexSpec]:
+    return [spec for spec in INDEXES if spec.unique]
+
+
+def group_by_model(
+    specs: Sequence[IndexSpec] = INDEXES,
+) -> Dict[Type[Model], List[IndexSpec]]:
+    result: Dict[Type[Model], List[IndexSpec]] = {}
+    for spec in specs:
+        result.setdefault(spec.model, []).append(spec)
+    return result
+
+
+async def apply_indexes(
+    engine: AIOEngine, specs: Sequence[IndexSpec] = INDEXES
+) -> List[str]:
+    """
+    创建注册表中的索引，已经存在的不会重复创建
+
+    Returns:
+        List[str]: 创建（或已存在）的索引名
+    """
+    names = []
+    for model, specs in group_by_model(specs).items():
+        names.extend(
+            await engine.get_collection(model).create_indexes(
+                [spec.to_index_model() for spec in specs]
+            )
+        )
+    return names
+
+
+def apply_indexes_sync(
+    engine: SyncEngine, specs: Sequence[IndexSpec] = INDEXES
+) -> List[str]:
+    names = []
+    for model, specs in group_by_model(specs).items():
+        names.extend(
+            engine.get_collection(model).create_indexes(
+                [spec.to_index_model() for spec in specs]
+            )
+        )
+    return names
+
+
+def missing_indexes_sync(engine: SyncEngine) -> List[IndexSpec]:
+    """
+    注册表中有但数据库中没有的索引
+    """
+    missing = []
+    for model, specs in group_by_model().items():
+        existing = set(engine.get_collection(model).index_information())
+        missing.extend(spec for spec in specs if spec.name not in existing)
+    return missing
+
+
+def start_apply_indexes(engine: AIOEngine) -> None:
+    """
+    在后台创建索引，大集合建索引时不阻塞启动
+    """
+    global _build_task
+
+    async def run():
+        try:
+            names = await apply_indexes(engine)
+            log.info(f"Indexes ensured: {', '.join(names)}")
+        except Exception as e:
+            log.warning(f"Failed to apply indexes: {e}")
+
+    if _build_task is None or _build_task.done():
+        _build_task = asyncio.create_task(run())
@@ -2,13 +2,15 @@ from odmantic import AIOEngine, SyncEngine
 from motor.motor_asyncio import AsyncIOMotorClient
 from pymongo import MongoClient
 
-from app.config import MongodbConfig
+from app.config import MongodbConfig, MCIMConfig
 from app.models.database.curseforge import Mod, File, Fingerprint  # , ModFilesSyncInfo
 from app.models.database.modrinth import Project, Version, File as ModrinthFile
 from app.models.database.file_cdn import File as CDNFile
+from app.database.indexes import apply_indexes, start_apply_indexes, unique_indexes
 from app.utils.loger import log
 
 _mongodb_config = MongodbConfig.load()
+_mcim_config = MCIMConfig.load()
 
 aio_mongo_engine: AIOEngine = None
 sync_mongo_engine: SyncEngine = None
@@ -66,6 +68,14 @@ async def setup_async_mongodb(engine: AIOEngine) -> None:
             CDNFile,
         ]
     )
+    if _mcim_config.apply_indexes:
+        # 唯一索引在开始服务前创建，之后的 upsert 不会写入重复文档
+        try:
+            await apply_indexes(engine, unique_indexes())
+        except Exception as e:
+            log.error(f"Failed to apply unique indexes: {e}")
+        # 注册表中的复合索引等，后台创建
+        start_apply_indexes(engine)
 
 
 aio_mongo_engine: AIOEngine = init_mongodb_aioengine()
@@ -0,0 +1,152 @@
+"""
+只读查询
+
+直接用 Motor 查询原始文档，再由 render 转换为与 model_dump 一致的 dict，
+不构造 odmantic Model，省掉嵌套模型（FileInfo、Category、GalleryItem 等）的校验和重建
+
+开启 prerender 时，完整文档只查询预渲染的 JSON（见 app.utils.rendered），render 返回 RawJSON 直接拼接；
+还没有预渲染内容的旧文档回退查询完整文档
+"""
+
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple, Type, Union
+
+from odmantic import AIOEngine, Model
+from pydantic_core import PydanticUndefined
+
+from app.utils import rendered
+from app.utils.projection import Projection, format_document
+from app.utils.response.raw import RawJSON
+
+
+@lru_cache(maxsize=None)
+def _defaults(model: Type[Model]) -> Dict[str, Any]:
+    """
+    有固定默认值的字段，旧文档缺少后来新增的字段时补上，与 model_dump 保持一致
+    """
+    return {
+        name: field.default
+        for name, field in model.model_fields.items()
+        if field.default is not PydanticUndefined and field.default_factory is None
+    }
+
+
+def render(
+    model: Type[Model], doc: Dict[str, Any], projection: Optional[Projection] = None
+) -> Union[Dict[str, Any], RawJSON]:
+    """
+    _id -> id、时间格式化在同一次遍历中完成；完整文档再补全缺少的字段
+    """
+    if projection is not None:
+        return projection.apply(doc)
+    if rendered.is_valid(doc):
+        return RawJSON(rendered.splice(model, doc))
+    doc = format_document(doc)
+    for name, default in _defaults(model).items():
+        if name not in doc:
+            doc[name] = default
+    return doc
+
+
+def _use_rendered(model: Type[Model], projection: Optional[Projection]) -> bool:
+    return projection is None and rendered.enabled(model)
+
+
+def rendered_projection(
+    model: Type[Model], projection: Optional[Projection], fields: Iterable[str] = ()
+) -> Optional[Dict[str, int]]:
+    """
+    查询使用的 MongoDB projection，也用于聚合查询的 $project，不需要时返回 None
+    """
+    if projection is not None:
+        return projection.mongo
+    if rendered.enabled(model):
+        return rendered.projection(model, fields)
+    return None
+
+
+async def find_one(
+    engine: AIOEngine,
+    model: Type[Model],
+    query: Dict[str, Any],
+    projection: Optional[Projection] = None,
+    fields: Iterable[str] = (),
+) -> Optional[Dict[str, Any]]:
+    """
+    Args:
+        fields (Iterable[str]): 使用预渲染内容时调用方还需要读取的字段，如 found
+
+    Returns:
+        Optional[Dict[str, Any]]: 原始文档，用 render 转换后返回
+    """
+    collection = engine.get_collection(model)
+    doc = await collection.find_one(
+        query, rendered_projection(model, projection, fields)
+    )
+    if doc is not None and _use_rendered(model, projection) and not rendered.is_valid(doc):
+        doc = await collection.find_one({"_id": doc["_id"]})
+    return doc
+
+
+async def find(
+    engine: AIOEngine,
+    model: Type[Model],
+    query: Dict[str, Any],
+    projection: Optional[Projection] = None,
+    fields: Iterable[str] = (),
+    sort: Optional[List[Tuple[str, int]]] = None,
+    limit: int = 0,
+) -> List[Dict[str, Any]]:
+    docs = await engine.get_collection(model).find(
+        query, rendered_projection(model, projection, fields), sort=sort, limit=limit
+    ).to_list(length=None)
+    if not _use_rendered(model, projection):
+        return docs
+    return await complete(engine, model, docs)
+
+
+async def complete(
+    engine: AIOEngine, model: Type[Model], docs: List[Dict[str, Any]]
+) -> List[Dict[str, Any]]:
+    """
+    按 rendered_projection 查出的文档中，没有预渲染内容的一次性补查完整文档
+    """
+    if not rendered.enabled(model):
+        return docs
+    stale = [doc["_id"] for doc in docs if not rendered.is_valid(doc)]
+    if not stale:
+        return docs
+    full = {
+        doc["_id"]: doc
+        for doc in await engine.get_collection(model)
+        .find({"_id": {"$in": stale}})
+        .to_list(length=None)
+    }
+    return [
+        doc if rendered.is_valid(doc) else full[doc["_id"]]
+        for doc in docs
+        if rendered.is_valid(doc) or doc["_id"] in full
+    ]
+
+
+async def iterate(
+    engine: AIOEngine,
+    model: Type[Model],
+    query: Dict[str, Any],
+    projection: Optional[Projection] = None,
+    batch_size: Optional[int] = None,
+) -> AsyncIterator[Union[Dict[str, Any], RawJSON]]:
+    """
+    逐批读取并 render，用于流式输出
+    """
+    collection = engine.get_collection(model)
+    kwargs = {} if batch_size is None else {"batch_size": batch_size}
+    use_rendered = _use_rendered(model, projection)
+    async for doc in collection.find(
+        query, rendered_projection(model, projection), **kwargs
+    ):
+        if use_rendered and not rendered.is_valid(doc):
+            doc = await collection.find_one({"_id": doc["_id"]})
+            if doc is None:
+                continue
+        yield render(model, doc, projection)
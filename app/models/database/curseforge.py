@@ -326,3 +326,25 @@ class Fingerprint(Model):
     @field_serializer("sync_at")
     def serialize_sync_Date(self, value: datetime, _info):
         return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class FileCount(BaseModel):
+    gameVersions: List[str]  # 文件的 gameVersions 同时包含这些值
+    count: int
+
+
+class ModFileCount(Model):
+    """
+    Mod 的文件数，由 sync 维护，供 /v1/mods/{modId}/files 的分页信息使用
+
+    见 app/utils/file_counts
+    """
+
+    id: int = Field(primary_field=True)  # modId
+    total: int
+    counts: List[FileCount] = []
+    sync_at: datetime = Field(default_factory=datetime.utcnow)
+
+    model_config = {
+        "collection": "curseforge_mod_file_counts",
+    }
@@ -93,8 +93,9 @@ class File(Model):
     size: Optional[int] = None
     file_type: Optional[str] = None
 
-    version_id: Optional[str] #  = Field(index=True)  # 有可能没有该 file...
-    project_id: Optional[str] #  = Field(index=True)
+    # 索引见 app/database/indexes.py，嵌入主键的 hashes 无法在这里声明
+    version_id: Optional[str]  # 有可能没有该 file...
+    project_id: Optional[str]
 
     file_cdn_cached: Optional[bool] = False
     found: Optional[bool] = True
@@ -129,7 +130,7 @@ class Version(Model):
     status: Optional[str] = None
     requested_status: Optional[str] = None
     author_id: Optional[str] = None
-    date_published: Optional[datetime] = None #  = Field(index=True)
+    date_published: Optional[datetime] = None  # 索引见 app/database/indexes.py
     downloads: Optional[int] = None
     changelog_url: Optional[str] = None  # Deprecated
     files: Optional[List[FileInfo]] = None
@@ -149,3 +150,20 @@ class Version(Model):
         if isinstance(v, str):
             return datetime.strptime(v, "%Y-%m-%dT%H:%M:%S.%fZ")
         return v
+
+
+class LatestVersion(Model):
+    """
+    每个 (project_id, loader, game_version) 最新的 Version，由 sync 维护，供 version_file update 查询
+
+    见 app/utils/latest_version；没有任何组合的项目保存一条 loader、game_version、version_id 都为空的标记
+    """
+
+    project_id: str
+    loader: Optional[str] = None
+    game_version: Optional[str] = None
+    version_id: Optional[str] = None
+    date_published: Optional[str] = None  # 与 Version 中保存的格式一致，可以直接比较
+    sync_at: datetime = Field(default_factory=datetime.utcnow)
+
+    model_config = {"collection": "modrinth_latest_versions"}
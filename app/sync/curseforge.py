@@ -18,6 +18,8 @@ from app.models.database.file_cdn import File as FileCDN
 from app.utils.network import request_sync
 from app.config import MCIMConfig
 from app.utils.loger import log
+from app.utils.response_cache.tags import tags_for_models, invalidate_tags_sync, cf_mod
+from app.utils import rendered, file_counts
 from app.exceptions import ResponseCodeException
 
 
@@ -36,6 +38,46 @@ def submit_models(models: List[Union[File, Mod, Fingerprint]]):
     if len(models) != 0:
         mongodb_engine.save_all(models)
         log.debug(f"Submited: {len(models)}")
+        save_rendered(models)
+        invalidate_cache(models)
+
+
+def save_rendered(models: List[Union[File, Mod, Fingerprint]]):
+    """
+    保存预渲染的 JSON，失败不影响 sync，读取时会回退到完整文档
+    """
+    if not mcim_config.prerender:
+        return
+    try:
+        count = rendered.save_sync(mongodb_engine, models)
+        log.debug(f"Saved {count} rendered documents")
+    except Exception as e:
+        log.warning(f"Failed to save rendered documents: {e}")
+
+
+def save_file_counts(modId: int):
+    """
+    统计 Mod 的文件数，失败不影响 sync，查询时会从 curseforge_files 补建
+
+    文件已经在前面分页写入并失效过缓存，统计后再失效一次，避免期间缓存了旧的分页信息
+    """
+    try:
+        counts = file_counts.save_sync(mongodb_engine, modId)
+        log.debug(f"Saved file counts of mod {modId}: {counts.total}")
+        invalidate_tags_sync(redis_engine, [cf_mod(modId)])
+    except Exception as e:
+        log.warning(f"Failed to save file counts of mod {modId}: {e}")
+
+
+def invalidate_cache(models: List[Union[File, Mod, Fingerprint]]):
+    """
+    失效受影响的缓存，失败不影响 sync
+    """
+    try:
+        count = invalidate_tags_sync(redis_engine, tags_for_models(models))
+        log.debug(f"Invalidated {count} cache keys")
+    except Exception as e:
+        log.warning(f"Failed to invalidate cache: {e}")
 
 
 # def should_retry(retries_so_far, exception):
@@ -170,6 +212,7 @@ def sync_mod_all_files(
         log.info(
             f'Finished modid:{modId} i:ps:t {params["index"]}:{params["pageSize"]}:{page.totalCount}'
         )
+    save_file_counts(modId)
     log.info(f'Finished modid:{modId} with {res["pagination"]["totalCount"]} files')
 
 def sync_multi_mods_all_files(modIds: List[int]):
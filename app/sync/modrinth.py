@@ -36,6 +36,8 @@ from app.utils.network import request_sync, request
 from app.exceptions import ResponseCodeException
 from app.config import MCIMConfig
 from app.utils.loger import log
+from app.utils.response_cache.tags import tags_for_models, invalidate_tags_sync
+from app.utils import rendered, latest_version
 
 mcim_config = MCIMConfig.load()
 
@@ -47,6 +49,42 @@ def submit_models(models: List[Union[Project, File, Version]]):
     if len(models) != 0:
         log.debug(f"Submited: {len(models)}")
         mongodb_engine.save_all(models)
+        save_rendered(models)
+        invalidate_cache(models)
+
+
+def save_rendered(models: List[Union[Project, File, Version]]):
+    """
+    保存预渲染的 JSON，失败不影响 sync，读取时会回退到完整文档
+    """
+    if not mcim_config.prerender:
+        return
+    try:
+        count = rendered.save_sync(mongodb_engine, models)
+        log.debug(f"Saved {count} rendered documents")
+    except Exception as e:
+        log.warning(f"Failed to save rendered documents: {e}")
+
+
+def save_latest_versions(project_id: str, versions: List[Version]):
+    """
+    更新项目每个 (loader, game_version) 最新的版本，失败不影响 sync，查询时会从 modrinth_versions 补建
+    """
+    try:
+        latest_version.save_sync(mongodb_engine, project_id, versions)
+    except Exception as e:
+        log.warning(f"Failed to save latest versions of {project_id}: {e}")
+
+
+def invalidate_cache(models: List[Union[Project, File, Version]]):
+    """
+    失效受影响的缓存，失败不影响 sync
+    """
+    try:
+        count = invalidate_tags_sync(redis_engine, tags_for_models(models))
+        log.debug(f"Invalidated {count} cache keys")
+    except Exception as e:
+        log.warning(f"Failed to invalidate cache: {e}")
 
 
 # def should_retry(retries_so_far, exception):
@@ -126,6 +164,7 @@ def sync_project_all_version(
             models.append(Project(found=False, id=project_id, slug=project_id))
             return
     version_count = len(res)
+    versions = []
     for version in res:
         for file in version["files"]:
             file["version_id"] = version["id"]
@@ -150,7 +189,11 @@ def sync_project_all_version(
             if len(models) >= 100:
                 submit_models(models)
                 models = []
-        models.append(Version(found=True, slug=slug, **version))
+        version_model = Version(found=True, slug=slug, **version)
+        versions.append(version_model)
+        models.append(version_model)
+    # 在最后一次 submit_models 失效缓存之前写入
+    save_latest_versions(project_id, versions)
     submit_models(models)
     log.info(f'Synced project {project_id} {slug} with {version_count} versions')
 
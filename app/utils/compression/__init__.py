@@ -0,0 +1,181 @@
+"""
+响应压缩与 Accept-Encoding 协商
+
+brotli 和 zstandard 见 requirements.txt，未安装时只提供 gzip
+压缩参数可以按路径前缀覆盖，见 MCIMConfig.compression.rules
+"""
+
+import gzip
+import zlib
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from app.config.mcim import MCIMConfig
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+mcim_config = MCIMConfig.load()
+
+compression_config = mcim_config.compression
+
+# 同等 q 值时的优先级，越靠前越优先
+PREFERRED_ENCODINGS = tuple(compression_config.preferred_encodings)
+
+_MODULES = {"gzip": gzip, "br": brotli, "zstd": zstandard}
+
+
+class CompressionSettings(NamedTuple):
+    minimum_size: int
+    gzip_level: int
+    brotli_quality: int
+    zstd_level: int
+
+
+DEFAULT_SETTINGS = CompressionSettings(
+    minimum_size=compression_config.minimum_size,
+    gzip_level=compression_config.gzip_level,
+    brotli_quality=compression_config.brotli_quality,
+    zstd_level=compression_config.zstd_level,
+)
+
+# 最长前缀优先
+_RULES = sorted(
+    compression_config.rules, key=lambda rule: len(rule.path_prefix), reverse=True
+)
+
+
+def settings_for(path: Optional[str]) -> CompressionSettings:
+    """
+    按路径前缀取压缩参数，未匹配或未设置的字段使用全局值
+    """
+    if path is None:
+        return DEFAULT_SETTINGS
+    for rule in _RULES:
+        if path.startswith(rule.path_prefix):
+            return CompressionSettings(
+                *(
+                    default if value is None else value
+                    for default, value in zip(
+                        DEFAULT_SETTINGS,
+                        (
+                            rule.minimum_size,
+                            rule.gzip_level,
+                            rule.brotli_quality,
+                            rule.zstd_level,
+                        ),
+                    )
+                )
+            )
+    return DEFAULT_SETTINGS
+
+
+def available_encodings() -> List[str]:
+    return [
+        encoding
+        for encoding in PREFERRED_ENCODINGS
+        if _MODULES.get(encoding) is not None
+    ]
+
+
+def compress(
+    body: bytes, encoding: str, settings: CompressionSettings = DEFAULT_SETTINGS
+) -> bytes:
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=settings.gzip_level, mtime=0)
+    elif encoding == "br":
+        return brotli.compress(body, quality=settings.brotli_quality)
+    elif encoding == "zstd":
+        return zstandard.ZstdCompressor(level=settings.zstd_level).compress(body)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+class StreamCompressor:
+    """
+    流式压缩，给分块发送的响应用
+    """
+
+    def __init__(
+        self, encoding: str, settings: CompressionSettings = DEFAULT_SETTINGS
+    ):
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._compressor = zlib.compressobj(
+                settings.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+            )
+        elif encoding == "br":
+            self._compressor = brotli.Compressor(quality=settings.brotli_quality)
+        elif encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(
+                level=settings.zstd_level
+            ).compressobj()
+        else:
+            raise ValueError(f"Unsupported encoding: {encoding}")
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(data)
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush()
+
+
+def compress_all(
+    body: bytes, settings: CompressionSettings = DEFAULT_SETTINGS
+) -> Dict[str, bytes]:
+    """
+    生成所有可用编码的压缩版本，太小的 body 不压缩
+    """
+    if len(body) < settings.minimum_size:
+        return {}
+    return {
+        encoding: compress(body, encoding, settings)
+        for encoding in available_encodings()
+    }
+
+
+def parse_accept_encoding(accept_encoding: str) -> Dict[str, float]:
+    result = {}
+    for item in accept_encoding.split(","):
+        parts = item.strip().split(";")
+        encoding = parts[0].strip().lower()
+        if not encoding:
+            continue
+        q = 1.0
+        for param in parts[1:]:
+            name, _, value = param.strip().partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        result[encoding] = q
+    return result
+
+
+def negotiate(
+    accept_encoding: Optional[str], available: Iterable[str]
+) -> Optional[str]:
+    """
+    从 available 中选出客户端接受的最优编码，没有则返回 None（identity）
+    """
+    if not accept_encoding:
+        return None
+    accepted = parse_accept_encoding(accept_encoding)
+    best, best_q = None, 0.0
+    for encoding in PREFERRED_ENCODINGS:
+        if encoding not in available:
+            continue
+        q = accepted.get(encoding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
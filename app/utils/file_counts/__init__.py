@@ -0,0 +1,116 @@
+"""
+CurseForge Mod 的文件数
+
+/v1/mods/{modId}/files 原本每次用 $facet 的两个 $count 把 Mod 的文件全部数一遍，
+这里在 sync 拉取完 Mod 的全部文件后统计一次：总数、包含每个 gameVersions 值的文件数，
+以及包含每个 (gameVersion, loader) 组合的文件数，覆盖接口 gameVersion + modLoaderType 的所有过滤
+
+还没有统计过的 Mod（如上线前同步的）在查询时从 curseforge_files 补建
+"""
+
+import calendar
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, NamedTuple, Optional, Set, Tuple
+
+from odmantic import AIOEngine
+
+from app.models.database.curseforge import File, ModFileCount
+
+# 与 convert_modloadertype 的取值一致
+LOADERS = frozenset(["Forge", "Cauldron", "LiteLoader", "Fabric", "Quilt", "NeoForge"])
+
+CountKey = Tuple[str, ...]
+
+
+def filter_key(values: Iterable[str]) -> CountKey:
+    return tuple(sorted(set(values)))
+
+
+class FileCounts(NamedTuple):
+    total: int
+    counts: Dict[CountKey, int]
+    # 统计时间（毫秒），每次 sync 都会变化，作为分页边界缓存的数据版本
+    version: int = 0
+
+    def count(self, values: Iterable[str]) -> int:
+        """
+        gameVersions 同时包含 values 的文件数，values 为空时为总数
+        """
+        key = filter_key(values)
+        return self.counts.get(key, 0) if key else self.total
+
+
+def build(files: Iterable[Dict[str, Any]]) -> FileCounts:
+    total = 0
+    counts: Counter = Counter()
+    for file in files:
+        total += 1
+        values = set(file.get("gameVersions") or [])
+        keys: Set[CountKey] = {(value,) for value in values}
+        for loader in values & LOADERS:
+            keys.update(filter_key((value, loader)) for value in values if value != loader)
+        counts.update(keys)
+    return FileCounts(total, dict(counts))
+
+
+def document(modId: int, file_counts: FileCounts) -> Dict[str, Any]:
+    # gameVersions 中有 1.20.1 这样带点的值，不能直接作为字段名
+    return {
+        "_id": modId,
+        "total": file_counts.total,
+        "counts": [
+            {"gameVersions": list(key), "count": count}
+            for key, count in file_counts.counts.items()
+        ],
+        "sync_at": datetime.utcnow(),
+    }
+
+
+def version(sync_at: datetime) -> int:
+    # MongoDB 的 datetime 只保留到毫秒
+    return calendar.timegm(sync_at.utctimetuple()) * 1000 + sync_at.microsecond // 1000
+
+
+def parse(doc: Dict[str, Any]) -> FileCounts:
+    return FileCounts(
+        doc["total"],
+        {filter_key(item["gameVersions"]): item["count"] for item in doc["counts"]},
+        version(doc["sync_at"]),
+    )
+
+
+def save_sync(engine, modId: int) -> FileCounts:
+    """
+    sync 写入 Mod 的全部文件后调用
+
+    Args:
+        engine (SyncEngine): odmantic SyncEngine
+    """
+    doc = document(
+        modId,
+        build(engine.get_collection(File).find({"modId": modId}, {"gameVersions": 1})),
+    )
+    engine.get_collection(ModFileCount).replace_one({"_id": modId}, doc, upsert=True)
+    return parse(doc)
+
+
+async def get(engine: AIOEngine, modId: int) -> FileCounts:
+    """
+    读取文件数，没有统计过的 Mod 从 curseforge_files 补建；
+    一个文件都没有时不保存，等 sync 拉取后再统计
+    """
+    collection = engine.get_collection(ModFileCount)
+    doc: Optional[Dict[str, Any]] = await collection.find_one({"_id": modId})
+    if doc is not None:
+        return parse(doc)
+    file_counts = build(
+        await engine.get_collection(File)
+        .find({"modId": modId}, {"gameVersions": 1})
+        .to_list(length=None)
+    )
+    if not file_counts.total:
+        return file_counts
+    doc = document(modId, file_counts)
+    await collection.replace_one({"_id": modId}, doc, upsert=True)
+    return parse(doc)
@@ -0,0 +1,180 @@
+"""
+每个 (project_id, loader, game_version) 最新的 Version
+
+version_file update 原本要 $lookup 项目的全部 Version 再 $unwind、$match、$sort，
+版本多的项目每次都很慢；这里在 sync 拉取项目全部版本时整理出每个组合最新的版本，
+查询时按 (project_id, loader, game_version) 索引直接取，再在少量结果中取发布时间最新的一个
+
+sync 只写入本项目的组合，并删除本次没有写入的旧组合；没有任何组合的项目写入一条空标记，
+还没有整理过的项目（如上线前同步的）在查询时从 modrinth_versions 补建，有标记的不会重复补建
+
+(project_id, loader, game_version) 的唯一索引需要在 upsert 之前存在，否则并发 upsert 可能写入重复文档
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from odmantic import AIOEngine
+from pymongo import DeleteMany, UpdateOne
+
+from app.database.indexes import apply_indexes_sync, unique_indexes
+from app.models.database.modrinth import LatestVersion, Version
+
+# 读取 Version 时只需要这些字段
+VERSION_FIELDS = {"_id": 1, "loaders": 1, "game_versions": 1, "date_published": 1}
+
+# sync 进程中是否已经确认过唯一索引
+_index_ensured = False
+
+
+def _newer(candidate: Tuple[str, str], current: Optional[Tuple[str, str]]) -> bool:
+    # 按 (date_published, version_id) 比较，发布时间相同时结果固定
+    return current is None or candidate > current
+
+
+def build(versions: Iterable[Dict[str, Any]]) -> Dict[Tuple[str, str], Tuple[str, str]]:
+    """
+    Args:
+        versions (Iterable[Dict[str, Any]]): MongoDB 中保存格式的 Version，至少包含 VERSION_FIELDS
+
+    Returns:
+        Dict[Tuple[str, str], Tuple[str, str]]: (loader, game_version) -> (date_published, version_id)
+    """
+    result: Dict[Tuple[str, str], Tuple[str, str]] = {}
+    for version in versions:
+        candidate = (version.get("date_published") or "", version["_id"])
+        for loader in version.get("loaders") or []:
+            for game_version in version.get("game_versions") or []:
+                key = (loader, game_version)
+                if _newer(candidate, result.get(key)):
+                    result[key] = candidate
+    return result
+
+
+def operations(project_id: str, versions: Iterable[Dict[str, Any]]) -> List[Any]:
+    """
+    按组合 upsert，再删除这次没有写入的旧组合（版本被删除或 loader、game_version 变化）；
+    没有任何组合时写入空标记，查询时不再补建
+    """
+    now = datetime.utcnow()
+    latest = build(versions) or {(None, None): (None, None)}
+    result: List[Any] = [
+        UpdateOne(
+            {"project_id": project_id, "loader": loader, "game_version": game_version},
+            {
+                "$set": {
+                    "version_id": version_id,
+                    "date_published": date_published,
+                    "sync_at": now,
+                }
+            },
+            upsert=True,
+        )
+        for (loader, game_version), (date_published, version_id) in latest.items()
+    ]
+    result.append(DeleteMany({"project_id": project_id, "sync_at": {"$lt": now}}))
+    return result
+
+
+def stored(versions: Iterable[Version]) -> List[Dict[str, Any]]:
+    # 与 modrinth_versions 中保存的格式一致（date_published 经过 field_serializer）
+    fields = {"id", "loaders", "game_versions"}
+    return [
+        version.model_dump_doc(
+            include=fields if version.date_published is None else fields | {"date_published"}
+        )
+        for version in versions
+    ]
+
+
+def save_sync(engine, project_id: str, versions: Iterable[Version]) -> None:
+    """
+    sync 拉取项目全部版本后调用
+
+    Args:
+        engine (SyncEngine): odmantic SyncEngine
+    """
+    global _index_ensured
+    if not _index_ensured:
+        apply_indexes_sync(
+            engine, [spec for spec in unique_indexes() if spec.model is LatestVersion]
+        )
+        _index_ensured = True
+    engine.get_collection(LatestVersion).bulk_write(
+        operations(project_id, stored(versions)), ordered=True
+    )
+
+
+async def rebuild(engine: AIOEngine, project_ids: List[str]) -> None:
+    """
+    从 modrinth_versions 补建还没有整理过的项目，没有版本的项目也写入空标记
+    """
+    versions: Dict[str, List[Dict[str, Any]]] = {
+        project_id: [] for project_id in project_ids
+    }
+    async for version in engine.get_collection(Version).find(
+        {"project_id": {"$in": project_ids}}, {**VERSION_FIELDS, "project_id": 1}
+    ):
+        versions.setdefault(version["project_id"], []).append(version)
+    collection = engine.get_collection(LatestVersion)
+    for project_id, project_versions in versions.items():
+        await collection.bulk_write(
+            operations(project_id, project_versions), ordered=True
+        )
+
+
+def _filter(
+    project_ids: List[str],
+    loaders: Optional[List[str]],
+    game_versions: Optional[List[str]],
+) -> Dict[str, Any]:
+    # 为空时不按该维度过滤
+    result: Dict[str, Any] = {"project_id": {"$in": project_ids}}
+    if loaders is not None:
+        result["loader"] = {"$in": loaders}
+    if game_versions is not None:
+        result["game_version"] = {"$in": game_versions}
+    return result
+
+
+async def find_latest(
+    engine: AIOEngine,
+    project_ids: Iterable[str],
+    loaders: Optional[List[str]],
+    game_versions: Optional[List[str]],
+) -> Dict[str, str]:
+    """
+    Returns:
+        Dict[str, str]: project_id -> 匹配任一 loader 和任一 game_version 的最新 version_id
+    """
+    project_ids = list(dict.fromkeys(project_ids))
+    if not project_ids:
+        return {}
+    collection = engine.get_collection(LatestVersion)
+
+    async def query(ids: List[str]) -> Dict[str, Tuple[str, str]]:
+        latest: Dict[str, Tuple[str, str]] = {}
+        async for doc in collection.find(
+            _filter(ids, loaders, game_versions),
+            {"_id": 0, "project_id": 1, "version_id": 1, "date_published": 1},
+        ):
+            if doc.get("version_id") is None:
+                # 空标记
+                continue
+            candidate = (doc.get("date_published") or "", doc["version_id"])
+            if _newer(candidate, latest.get(doc["project_id"])):
+                latest[doc["project_id"]] = candidate
+        return latest
+
+    latest = await query(project_ids)
+    unmatched = [project_id for project_id in project_ids if project_id not in latest]
+    if unmatched:
+        # 没有匹配结果的项目中，区分确实没有匹配的版本和还没有整理过
+        built = set(
+            await collection.distinct("project_id", {"project_id": {"$in": unmatched}})
+        )
+        missing = [project_id for project_id in unmatched if project_id not in built]
+        if missing:
+            await rebuild(engine, missing)
+            latest.update(await query(missing))
+    return {project_id: version_id for project_id, (_, version_id) in latest.items()}
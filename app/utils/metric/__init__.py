@@ -1,5 +1,5 @@
 from prometheus_fastapi_instrumentator import Instrumentator, metrics
-from prometheus_client import Gauge, CollectorRegistry, Counter
+from prometheus_client import Gauge, CollectorRegistry, Counter, Histogram
 from fastapi import FastAPI
 
 APP_REGISTRY = CollectorRegistry()
@@ -27,14 +27,95 @@ TRUSTABLE_RESPONSE_GAUGE = Gauge(
     multiprocess_mode="livesum",
 )
 
-REDIS_CACHE_HIT_GAUGE = Gauge(
-    "redis_cache_hit",
-    "Redis cache hit",
+RESPONSE_CACHE_HIT_COUNT = Counter(
+    "response_cache_hit_total",
+    "Response cache hits.",
+    labelnames=("func", "layer"),  # layer: l1 / redis / stale / shared
+    registry=APP_REGISTRY,
+)
+
+RESPONSE_CACHE_MISS_COUNT = Counter(
+    "response_cache_miss_total",
+    "Response cache misses.",
+    labelnames=("func",),
+    registry=APP_REGISTRY,
+)
+
+RESPONSE_CACHE_BYPASS_COUNT = Counter(
+    "response_cache_bypass_total",
+    "Responses not served from or not written to the response cache.",
+    labelnames=("func", "reason"),  # reason: force / disabled / non_200 / no_cache / too_large
+    registry=APP_REGISTRY,
+)
+
+RESPONSE_CACHE_SERVED_BYTES = Counter(
+    "response_cache_served_bytes_total",
+    "Body bytes served from the response cache.",
+    labelnames=("func",),
+    registry=APP_REGISTRY,
+)
+
+RESPONSE_CACHE_REDIS_GET_LATENCY = Histogram(
+    "response_cache_redis_get_seconds",
+    "Redis GET latency of the response cache.",
+    labelnames=("func",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+    registry=APP_REGISTRY,
+)
+
+RESPONSE_CACHE_ENCODE_TIME = Histogram(
+    "response_cache_encode_seconds",
+    "Time to encode (and compress) a response for the cache.",
+    labelnames=("func",),
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1),
+    registry=APP_REGISTRY,
+)
+
+RESPONSE_CACHE_DECODE_TIME = Histogram(
+    "response_cache_decode_seconds",
+    "Time to decode a cached response.",
+    labelnames=("func",),
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05),
+    registry=APP_REGISTRY,
+)
+
+RESPONSE_CACHE_BODY_SIZE = Histogram(
+    "response_cache_body_bytes",
+    "Size of cached entries written to Redis.",
     labelnames=("func",),
+    buckets=tuple(256 * 4**i for i in range(8)),  # 256B ~ 4MiB
+    registry=APP_REGISTRY,
+)
+
+RATE_LIMIT_REJECT_COUNT = Counter(
+    "rate_limit_reject_total",
+    "Requests rejected by the per-client token bucket.",
+    labelnames=("group", "backend"),  # backend: redis / local
+    registry=APP_REGISTRY,
+)
+
+REQUEST_ADMISSION_COUNT = Counter(
+    "request_admission_total",
+    "Admission decisions of the load shedder.",
+    labelnames=("group", "decision"),  # decision: admitted / loop_lag / in_flight / bulkhead
+    registry=APP_REGISTRY,
+)
+
+REQUEST_IN_FLIGHT_GAUGE = Gauge(
+    "request_in_flight",
+    "Requests in flight per route group.",
+    labelnames=("group",),
     registry=APP_REGISTRY,
     multiprocess_mode="livesum",
 )
 
+EVENT_LOOP_LAG = Histogram(
+    "event_loop_lag_seconds",
+    "Event loop scheduling lag sampled by the load shedder.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+    registry=APP_REGISTRY,
+)
+
 
 def init_prometheus_metrics(app: FastAPI):
     INSTRUMENTATOR: Instrumentator = Instrumentator(
@@ -3,6 +3,11 @@ from app.utils.middleware.timing import TimingMiddleware
 from app.utils.middleware.count_trustable import CountTrustableMiddleware
 from app.utils.middleware.etag import EtagMiddleware
 from app.utils.middleware.uncache_post import UncachePOSTMiddleware
+from app.utils.middleware.cache_front import CacheFrontMiddleware
+from app.utils.middleware.compression import CompressionMiddleware
+from app.utils.middleware.response_format import ResponseFormatMiddleware
+from app.utils.middleware.rate_limit import RateLimitMiddleware
+from app.utils.middleware.load_shedding import LoadSheddingMiddleware
 
 __ALL__ = [
     ForceSyncMiddleware,
@@ -10,4 +15,9 @@ __ALL__ = [
     CountTrustableMiddleware,
     EtagMiddleware,
     UncachePOSTMiddleware,
+    CacheFrontMiddleware,
+    CompressionMiddleware,
+    ResponseFormatMiddleware,
+    RateLimitMiddleware,
+    LoadSheddingMiddleware,
 ]
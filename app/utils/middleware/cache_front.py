@@ -0,0 +1,83 @@
+"""
+ASGI 层的缓存前置
+
+在路由、参数校验之前按 method + path + 排序后的 query 查缓存，命中直接返回已编码的 body；
+未命中把 key 放进 request.state.cache_front_key，由 cache 装饰器写入同一个 key
+"""
+
+import time
+from starlette.datastructures import Headers, QueryParams
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.utils.response_cache import Cache
+from app.utils.response_cache.key_builder import request_key_builder
+from app.utils.response_cache.resp_builder import ResponseBuilder
+from app.utils.response.negotiation import get_response_format
+from app.utils import warmup
+from app.utils.metric import (
+    RESPONSE_CACHE_HIT_COUNT,
+    RESPONSE_CACHE_SERVED_BYTES,
+    RESPONSE_CACHE_REDIS_GET_LATENCY,
+)
+
+FUNC_NAME = "cache_front"
+
+
+class CacheFrontMiddleware:
+    """
+    放在 CORS 之内、其他中间件之外，命中时跳过后面全部中间件和路由
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "GET"
+            or not Cache.enabled
+            or "force" in QueryParams(scope["query_string"])
+        ):
+            return await self.app(scope, receive, send)
+
+        query_string = scope["query_string"].decode("latin-1")
+        key = request_key_builder(
+            scope["method"],
+            scope["path"],
+            query_string,
+            namespace=Cache.namespace,
+            response_format=get_response_format(),
+        )
+
+        value, layer = None, "l1"
+        if Cache.l1 is not None:
+            value = Cache.l1.get(key)
+        if value is None:
+            layer = "redis"
+            start = time.perf_counter()
+            data = await Cache.backend.get(key)
+            RESPONSE_CACHE_REDIS_GET_LATENCY.labels(FUNC_NAME).observe(
+                time.perf_counter() - start
+            )
+            value = ResponseBuilder.load(data) if data is not None else None
+
+        # 过期的条目交给装饰器处理 stale-while-revalidate
+        if value is None or (
+            value.expire_at is not None and value.expire_at <= time.time()
+        ):
+            scope.setdefault("state", {})["cache_front_key"] = key
+            return await self.app(scope, receive, send)
+
+        headers = Headers(scope=scope)
+        response = ResponseBuilder.decode(
+            value,
+            accept_encoding=headers.get("accept-encoding"),
+            if_none_match=headers.get("if-none-match"),
+        )
+        RESPONSE_CACHE_HIT_COUNT.labels(FUNC_NAME, layer).inc()
+        RESPONSE_CACHE_SERVED_BYTES.labels(FUNC_NAME).inc(len(response.body))
+        # 命中不会经过 TimingMiddleware，在这里记录预热
+        warmup.record(
+            scope["method"], scope["path"], query_string, value.status_code, headers
+        )
+        await response(scope, receive, send)
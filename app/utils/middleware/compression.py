@@ -0,0 +1,99 @@
+"""
+按 Accept-Encoding 协商 br / zstd / gzip 压缩响应，替代 GZipMiddleware
+
+已经带 Content-Encoding 的响应（如命中缓存的预压缩版本）直接放行
+"""
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.compression import (
+    StreamCompressor,
+    available_encodings,
+    compress,
+    negotiate,
+    settings_for,
+)
+
+# 不压缩的状态码和类型
+SKIP_STATUS = (204, 304)
+SKIP_CONTENT_TYPES = ("text/event-stream", "image/", "video/", "application/zip")
+
+
+def add_vary(headers: MutableHeaders) -> None:
+    vary = headers.get("vary", "")
+    if "accept-encoding" not in vary.lower():
+        headers.add_vary_header("Accept-Encoding")
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        encoding = negotiate(
+            Headers(scope=scope).get("accept-encoding"), available_encodings()
+        )
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        settings = settings_for(scope["path"])
+        start_message = None
+        # None: 还没决定；False: 原样发送；StreamCompressor: 流式压缩
+        compressor = None
+
+        async def send_wrapper(message: Message):
+            nonlocal start_message, compressor
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if (
+                    message["status"] in SKIP_STATUS
+                    or "content-encoding" in headers
+                    or headers.get("content-type", "").startswith(SKIP_CONTENT_TYPES)
+                ):
+                    compressor = False
+                    await send(message)
+                else:
+                    # 等第一个 body 再决定是否压缩
+                    start_message = message
+                return
+
+            if message["type"] != "http.response.body" or compressor is False:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                headers = MutableHeaders(scope=start_message)
+                if not more_body:
+                    # 一次性发送的响应
+                    if len(body) < settings.minimum_size:
+                        compressor = False
+                        await send(start_message)
+                        await send(message)
+                        return
+                    body = compress(body, encoding, settings)
+                    headers["Content-Encoding"] = encoding
+                    headers["Content-Length"] = str(len(body))
+                    add_vary(headers)
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                compressor = StreamCompressor(encoding, settings)
+                headers["Content-Encoding"] = encoding
+                add_vary(headers)
+                del headers["Content-Length"]
+                await send(start_message)
+
+            data = compressor.compress(body)
+            if not more_body:
+                data += compressor.flush()
+            await send(
+                {"type": "http.response.body", "body": data, "more_body": more_body}
+            )
+
+        await self.app(scope, receive, send_wrapper)
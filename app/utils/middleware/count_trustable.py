@@ -2,23 +2,31 @@
 统计 Trustable 请求
 """
 
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.utils.metric import TRUSTABLE_RESPONSE_GAUGE
 
 
-class CountTrustableMiddleware(BaseHTTPMiddleware):
+class CountTrustableMiddleware:
     """
     统计 Trustable 请求
     """
 
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        route = request.scope.get("route")
-        if route:
-            if response.headers.get("Trustable") == "True":
-                TRUSTABLE_RESPONSE_GAUGE.labels(route=route.name).inc()
-            else:
-                TRUSTABLE_RESPONSE_GAUGE.labels(route=route.name).dec()
-        return response
\ No newline at end of file
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                route = scope.get("route")
+                if route:
+                    if (b"trustable", b"True") in message.get("headers", ()):
+                        TRUSTABLE_RESPONSE_GAUGE.labels(route=route.name).inc()
+                    else:
+                        TRUSTABLE_RESPONSE_GAUGE.labels(route=route.name).dec()
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
@@ -2,46 +2,55 @@
 给 Response 添加 Etag
 """
 
-from fastapi.responses import Response
-import hashlib
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from app.utils.response import generate_etag
 
-# Etag
-def generate_etag(response: Response) -> str:
-    """
-    Get Etag from response
-
-    SHA1 hash of the response content and status code
-
-    Args:
-        response (Response): response
 
-    Returns:
-        str: Etag
-    """
-    hash_tool = hashlib.sha1()
-    hash_tool.update(response.body)
-    hash_tool.update(str(response.status_code).encode())
-    return hash_tool.hexdigest()
-
-
-class EtagMiddleware(BaseHTTPMiddleware):
+class EtagMiddleware:
     """
     给 Response 添加 Etag
-    """
 
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        if request.url.path.split("/")[1] in ["modrinth", "curseforge", "file_cdn"] and response.status_code == 200:
-            etag = generate_etag(response)
-
-            # if_none_match = request.headers.get("If-None-Match")
-            # if if_none_match == etag:
-            #     response = Response(status_code=304)
-            # else:
-            #     response.headers["Etag"] = etag
+    已经带 Etag 的响应（如 BaseResponse）直接放行，否则缓冲 body 计算
+    """
 
-            response.headers["Etag"] = f'"{etag}"'
-        return response
\ No newline at end of file
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"].split("/")[1] not in [
+            "modrinth",
+            "curseforge",
+            "file_cdn",
+        ]:
+            return await self.app(scope, receive, send)
+
+        start_message = None
+        chunks = []
+
+        async def send_wrapper(message: Message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                if message["status"] != 200 or "etag" in headers:
+                    await send(message)
+                    return
+                start_message = message
+                return
+            if start_message is None:
+                await send(message)
+                return
+
+            # 缓冲 body 直到结束
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(chunks)
+            MutableHeaders(scope=start_message)["Etag"] = generate_etag(
+                body, start_message["status"]
+            )
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
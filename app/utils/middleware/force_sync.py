@@ -8,31 +8,32 @@ request.state.force_sync 设置为 True
 然后把 response 的 Cache-Control 设置为 no-cache
 """
 
-from fastapi import FastAPI, Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.responses import Response
+from starlette.datastructures import MutableHeaders, QueryParams
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.utils.loger import log
 
-class ForceSyncMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
+class ForceSyncMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
         # 检查 URL 参数 force 是否为 True
-        force_sync = False
-        if request.query_params.get('force') in ['true', 'True', True, 1]:
-            force_sync = True
-            
-        if force_sync:
-            # 设置 request.state.force_sync 为 True
-            request.state.force_sync = True
-        else:
-            # 设置 request.state.force_sync 为 False
-            request.state.force_sync = False
-        
-        # 获取响应
-        response = await call_next(request)
-        
-        if force_sync:
-            # 设置响应的 Cache-Control 头为 no-cache
-            response.headers['Cache-Control'] = 'no-cache'
-        
-        return response
\ No newline at end of file
+        force_sync = QueryParams(scope["query_string"]).get("force") in ["true", "True"]
+
+        # 设置 request.state.force_sync
+        scope.setdefault("state", {})["force_sync"] = force_sync
+
+        if not force_sync:
+            return await self.app(scope, receive, send)
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                # 设置响应的 Cache-Control 头为 no-cache
+                MutableHeaders(scope=message)["Cache-Control"] = "no-cache"
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
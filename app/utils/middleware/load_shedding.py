@@ -0,0 +1,54 @@
+"""
+按路由分组限制并发，过载时返回 503 + Retry-After
+"""
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.config.mcim import MCIMConfig
+from app.utils.load_shedding import ADMITTED, LoadShedder
+from app.utils.response import BaseResponse
+from app.utils.route_group import scope_group
+from app.utils.metric import REQUEST_ADMISSION_COUNT, REQUEST_IN_FLIGHT_GAUGE
+
+mcim_config = MCIMConfig.load()
+
+
+def service_unavailable() -> BaseResponse:
+    return BaseResponse(
+        status_code=503,
+        content={"code": 503, "message": "Service Unavailable"},
+        headers={
+            "Retry-After": str(mcim_config.load_shedding.retry_after),
+            "Cache-Control": "no-cache",
+        },
+    )
+
+
+class LoadSheddingMiddleware:
+    """
+    放在 CacheFrontMiddleware 之内，缓存前置命中的请求不占并发名额
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        group = scope_group(scope)
+        if group is None:
+            return await self.app(scope, receive, send)
+
+        decision = LoadShedder.check(group)
+        if decision == ADMITTED and not await LoadShedder.acquire(group):
+            decision = "bulkhead"
+        REQUEST_ADMISSION_COUNT.labels(group, decision).inc()
+        if decision != ADMITTED:
+            return await service_unavailable()(scope, receive, send)
+
+        LoadShedder.in_flight += 1
+        REQUEST_IN_FLIGHT_GAUGE.labels(group).inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            LoadShedder.in_flight -= 1
+            REQUEST_IN_FLIGHT_GAUGE.labels(group).dec()
+            LoadShedder.release(group)
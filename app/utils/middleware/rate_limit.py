@@ -0,0 +1,44 @@
+"""
+按客户端令牌桶限流，超出预算直接返回 429，不进入路由和数据库查询
+"""
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.utils.rate_limit import RateLimiter, client_identity, limited_group
+from app.utils.response import BaseResponse
+from app.utils.route_group import scope_group
+from app.utils.metric import RATE_LIMIT_REJECT_COUNT
+
+
+class RateLimitMiddleware:
+    """
+    放在最外层（CORS 之内），被拒绝的请求只花一次 Redis 往返
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        group = scope_group(scope)
+        if not limited_group(group):
+            return await self.app(scope, receive, send)
+
+        identity = client_identity(scope, Headers(scope=scope))
+        if identity is None:
+            return await self.app(scope, receive, send)
+
+        decision, backend = await RateLimiter.take(group, identity)
+        if decision.allowed:
+            return await self.app(scope, receive, send)
+
+        RATE_LIMIT_REJECT_COUNT.labels(group, backend).inc()
+        response = BaseResponse(
+            status_code=429,
+            content={"code": 429, "message": "Too Many Requests"},
+            headers={
+                "Retry-After": str(decision.retry_after),
+                "Cache-Control": "no-cache",
+            },
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,44 @@
+"""
+按 Accept 协商响应格式（JSON / MessagePack），结果写入 contextvar 供 BaseResponse 和缓存 key 使用
+"""
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.utils.response.negotiation import (
+    msgpack_available,
+    negotiate_format,
+    reset_response_format,
+    set_response_format,
+)
+
+
+class ResponseFormatMiddleware:
+    """
+    放在 CacheFrontMiddleware 之外，缓存前置命中时也能按格式取 key
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not msgpack_available():
+            return await self.app(scope, receive, send)
+
+        token = set_response_format(negotiate_format(Headers(scope=scope).get("accept")))
+
+        async def send_wrapper(message: Message):
+            if message["type"] == "http.response.start":
+                # 同一个 URL 按 Accept 返回不同内容
+                headers = MutableHeaders(scope=message)
+                if "accept" not in [
+                    value.strip().lower()
+                    for value in headers.get("vary", "").split(",")
+                ]:
+                    headers.add_vary_header("Accept")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            reset_response_format(token)
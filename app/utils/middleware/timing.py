@@ -3,25 +3,51 @@ DEBUG 记录请求处理时间
 """
 
 import time
-import inspect
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
 from app.utils.loger import log
+from app.utils import warmup
+
+
+class TimingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
 
-class TimingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
         start_time = time.time()
-        response = await call_next(request)
+        status_code = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
         process_time = time.time() - start_time
-        route = request.scope.get("route")
+        # 路由匹配后 scope 中会带上 route
+        route = scope.get("route")
         if route:
             route_name = route.name
+            method = scope["method"]
+            path = scope["path"]
+            query_string = scope["query_string"].decode("latin-1")
+            url = f"{path}?{query_string}" if query_string else path
             if process_time >= 10:
-                log.warning(f"{route_name} - {request.method} {request.url} {process_time:.2f}s")
+                log.warning(f"{route_name} - {method} {url} {process_time:.2f}s")
             elif process_time < 0.01: # 这应该是 redis 缓存，直接忽略
-                # log.debug(f"{route_name} - {request.method} {request.url} {process_time:.2f}s")
+                # log.debug(f"{route_name} - {method} {url} {process_time:.2f}s")
                 pass
             else:
-                log.debug(f"{route_name} - {request.method} {request.url} {process_time:.2f}s")
-        return response
+                log.debug(f"{route_name} - {method} {url} {process_time:.2f}s")
+            warmup.record(
+                method,
+                path,
+                query_string,
+                status_code,
+                Headers(scope=scope),
+            )
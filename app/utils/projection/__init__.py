@@ -0,0 +1,143 @@
+"""
+稀疏字段集 fields / exclude
+
+把查询参数转换为 MongoDB projection，直接查询原始文档，避免加载和序列化用不到的大字段
+（Project.body、Version.changelog、Mod.screenshots 等）
+
+    ?fields=id,title,versions
+    ?exclude=body,gallery
+    ?fields=files.hashes,files.url  # 支持嵌套字段
+"""
+
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional, Set, Type
+
+from odmantic import Model
+
+from app.utils.rendered import INTERNAL_FIELDS
+
+DATETIME_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def parse_field_list(value: Optional[str]) -> Set[str]:
+    if not value:
+        return set()
+    return {field.strip() for field in value.split(",") if field.strip()}
+
+
+def collapse_paths(paths: Iterable[str]) -> Set[str]:
+    """
+    去掉已被父字段覆盖的子字段，MongoDB 的 projection 同时包含 files 和 files.hashes 会报路径冲突
+    """
+    paths = set(paths)
+    return {
+        path
+        for path in paths
+        if not any(
+            ".".join(path.split(".")[:depth]) in paths
+            for depth in range(1, path.count(".") + 1)
+        )
+    }
+
+
+def format_document(doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    原始文档转换为与 model_dump 一致的格式：_id -> id，时间格式化，去掉预渲染字段，
+    一次遍历并保持字段顺序
+    """
+    return {
+        ("id" if key == "_id" else key): (
+            value.strftime(DATETIME_FORMAT) if isinstance(value, datetime) else value
+        )
+        for key, value in doc.items()
+        if key not in INTERNAL_FIELDS
+    }
+
+
+class Projection:
+    """
+    Args:
+        include (Set[str]): 需要返回的字段，与 exclude 二选一
+
+        exclude (Set[str]): 不返回的字段
+
+        required (Iterable[str]): 接口内部需要的字段，总会查询，未请求时从结果中去掉
+    """
+
+    def __init__(
+        self,
+        include: Set[str],
+        exclude: Set[str],
+        required: Iterable[str] = (),
+    ):
+        self.include = include
+        self.exclude = exclude
+        self.required = set(required)
+
+    @staticmethod
+    def _key(field: str) -> str:
+        name, dot, rest = field.partition(".")
+        return f"_id{dot}{rest}" if name == "id" else field
+
+    @property
+    def mongo(self) -> Dict[str, int]:
+        if self.include:
+            # id 总是返回
+            return {
+                field: 1
+                for field in collapse_paths(
+                    self._key(field) for field in self.include | self.required
+                )
+            }
+        return {
+            field: 0
+            for field in collapse_paths(
+                [
+                    *(
+                        self._key(field)
+                        for field in self.exclude
+                        if field not in self.required
+                    ),
+                    *INTERNAL_FIELDS,
+                ]
+            )
+        }
+
+    def apply(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        doc = format_document(doc)
+        for field in self.required:
+            if self.include:
+                if field != "id" and field not in self.include:
+                    doc.pop(field, None)
+            elif field in self.exclude:
+                doc.pop(field, None)
+        return doc
+
+
+def parse_projection(
+    model: Type[Model],
+    fields: Optional[str] = None,
+    exclude: Optional[str] = None,
+    required: Iterable[str] = (),
+) -> Optional[Projection]:
+    """
+    未指定 fields / exclude 时返回 None，按原来的方式返回完整文档
+
+    Raises:
+        ValueError: 同时指定 fields 和 exclude，或字段不存在
+    """
+    include_fields = parse_field_list(fields)
+    exclude_fields = parse_field_list(exclude)
+    if not include_fields and not exclude_fields:
+        return None
+    if include_fields and exclude_fields:
+        raise ValueError("fields and exclude can not be used together")
+
+    unknown = [
+        field
+        for field in include_fields | exclude_fields
+        if field.split(".", 1)[0] not in model.model_fields
+    ]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return Projection(include_fields, exclude_fields, required)
@@ -0,0 +1,198 @@
+"""
+按客户端的令牌桶限流
+
+客户端由 X-Forwarded-For 中反代追加的地址和 / 或 UA 区分，
+每个路由分组一个桶，预算见 MCIMConfig.rate_limit.buckets
+
+令牌桶状态保存在 Redis rate_limit 库，所有 worker 共享；
+Redis 出错时在 redis_retry_interval 秒内改用进程内的桶，预算按 worker 计算，会比平时宽松
+"""
+
+import hashlib
+import math
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from starlette.datastructures import Headers
+
+from app.config.mcim import MCIMConfig, TokenBucket
+from app.config.redis import RedisdbConfig
+from app.utils.loger import log
+
+mcim_config = MCIMConfig.load()
+redis_config = RedisdbConfig.load()
+rate_limit_config = mcim_config.rate_limit
+
+NAMESPACE = "rate_limit"
+
+# 返回 {是否放行, 剩余令牌, 需要等待的秒数}，小数用字符串返回避免被截断
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local ttl = tonumber(ARGV[4])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1])
+local ts = tonumber(bucket[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], ttl)
+return {allowed, tostring(tokens), tostring(retry_after)}
+"""
+
+
+class Decision(NamedTuple):
+    allowed: bool
+    remaining: int
+    retry_after: int  # 秒，向上取整，放行时为 0
+
+
+def forwarded_ip(headers: Headers) -> Optional[str]:
+    """
+    X-Forwarded-For 中最后一层可信反代记录的客户端地址
+
+    客户端自己发送的 X-Forwarded-For 在左边，只取反代追加的右边 forwarded_hops 个中最左的一个
+    """
+    hops = rate_limit_config.forwarded_hops
+    if not rate_limit_config.trust_forwarded or hops < 1:
+        return None
+    forwarded = [
+        ip.strip() for ip in ",".join(headers.getlist("x-forwarded-for")).split(",")
+    ]
+    forwarded = [ip for ip in forwarded if ip]
+    if len(forwarded) < hops:
+        # 没有经过全部反代
+        return None
+    return forwarded[-hops]
+
+
+def client_identity(scope: dict, headers: Headers) -> Optional[str]:
+    """
+    客户端标识，豁免的客户端返回 None
+    """
+    peer = scope["client"][0] if scope.get("client") else None
+    forwarded = forwarded_ip(headers)
+    ua = headers.get("user-agent", "")
+
+    # X-Forwarded-For 可以伪造，豁免只看连接的对端；
+    # 经过反代的请求对端都是反代（可能就是 127.0.0.1），不豁免
+    if forwarded is None and peer in rate_limit_config.exempt_ips:
+        return None
+    if ua and any(ua.startswith(prefix) for prefix in rate_limit_config.exempt_user_agents):
+        return None
+
+    ip = forwarded or peer
+    parts = {"ip": ip or "", "ua": ua}
+    return "|".join(parts[name] for name in rate_limit_config.key_by)
+
+
+def bucket_key(group: str, identity: str) -> str:
+    digest = hashlib.md5(identity.encode()).hexdigest()  # noqa: S324
+    return f"{NAMESPACE}:{group}:{digest}"
+
+
+def bucket_ttl(bucket: TokenBucket) -> int:
+    # 桶从空到满所需的时间，过后状态与新桶一致
+    return max(1, math.ceil(bucket.capacity / bucket.refill_rate))
+
+
+class LocalBuckets:
+    """
+    进程内令牌桶，Redis 不可用时使用，按客户端数 LRU 淘汰
+    """
+
+    def __init__(self, max_clients: int):
+        self.max_clients = max_clients
+        # key -> (tokens, ts)
+        self._data: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, key: str, bucket: TokenBucket, now: float) -> Decision:
+        tokens, ts = self._data.pop(key, (bucket.capacity, now))
+        tokens = min(bucket.capacity, tokens + max(0.0, now - ts) * bucket.refill_rate)
+        if tokens >= 1:
+            tokens -= 1
+            decision = Decision(True, int(tokens), 0)
+        else:
+            decision = Decision(
+                False, 0, math.ceil((1 - tokens) / bucket.refill_rate)
+            )
+        self._data[key] = (tokens, now)
+        while len(self._data) > self.max_clients:
+            self._data.popitem(last=False)
+        return decision
+
+
+class RateLimiter:
+    backend: Optional[Redis] = None
+    local: LocalBuckets = LocalBuckets(rate_limit_config.local_max_clients)
+    # Redis 出错后到这个时间之前使用进程内限流
+    redis_down_until: float = 0
+
+    @classmethod
+    def init(cls, backend: Optional[Redis] = None) -> None:
+        cls.backend = (
+            Redis(
+                host=redis_config.host,
+                port=redis_config.port,
+                db=redis_config.database.rate_limit,
+                password=redis_config.password,
+            )
+            if backend is None
+            else backend
+        )
+        cls.local = LocalBuckets(rate_limit_config.local_max_clients)
+        cls.redis_down_until = 0
+
+    @classmethod
+    async def take(cls, group: str, identity: str) -> Tuple[Decision, str]:
+        """
+        从客户端在该分组的桶里取一个令牌
+
+        Returns:
+            Tuple[Decision, str]: 结果和使用的后端 redis / local
+        """
+        bucket = rate_limit_config.buckets[group]
+        key = bucket_key(group, identity)
+        now = time.time()
+        if cls.backend is not None and now >= cls.redis_down_until:
+            try:
+                allowed, tokens, retry_after = await cls.backend.eval(
+                    TOKEN_BUCKET_SCRIPT,
+                    1,
+                    key,
+                    bucket.capacity,
+                    bucket.refill_rate,
+                    now,
+                    bucket_ttl(bucket),
+                )
+                return (
+                    Decision(
+                        bool(int(allowed)),
+                        int(float(tokens)),
+                        math.ceil(float(retry_after)),
+                    ),
+                    "redis",
+                )
+            except (RedisError, OSError) as e:
+                cls.redis_down_until = now + rate_limit_config.redis_retry_interval
+                log.warning(f"Rate limit redis failed, fallback to local: {e}")
+        return cls.local.take(key, bucket, now), "local"
+
+
+def limited_group(group: Optional[str]) -> bool:
+    return group is not None and group in rate_limit_config.buckets
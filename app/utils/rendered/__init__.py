@@ -0,0 +1,113 @@
+"""
+预渲染 JSON
+
+sync 保存 Project / Version / Mod / File 后，把与 model_dump 一致的 JSON 存入文档的 _rendered 字段，
+读取完整文档时直接拼接到响应中，不再构造 dict 逐字段序列化
+
+translated_* 字段由翻译单独更新，不放进预渲染内容，读取时从文档中取出拼接到末尾，
+所以翻译变化后不需要重建；_rendered_at 与 sync_at 不一致时
+（文档被未开启预渲染的 sync 覆盖过）视为失效，回退到普通渲染
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Tuple, Type
+
+from odmantic import Model
+from pymongo import UpdateOne
+
+from app.config.mcim import MCIMConfig
+from app.models.database.curseforge import Mod, File as CurseforgeFile
+from app.models.database.modrinth import Project, Version
+from app.utils.response.raw import dumps
+
+mcim_config = MCIMConfig.load()
+
+RENDERED_FIELD = "_rendered"
+RENDERED_AT_FIELD = "_rendered_at"
+INTERNAL_FIELDS = (RENDERED_FIELD, RENDERED_AT_FIELD)
+
+MODELS = (Project, Version, Mod, CurseforgeFile)
+
+
+def enabled(model: Type[Model]) -> bool:
+    return mcim_config.prerender and model in MODELS
+
+
+@lru_cache(maxsize=None)
+def translated_fields(model: Type[Model]) -> Tuple[str, ...]:
+    return tuple(name for name in model.model_fields if name.startswith("translated_"))
+
+
+def build(instance: Model) -> bytes:
+    return dumps(instance.model_dump(exclude=set(translated_fields(type(instance)))))
+
+
+def updates(models: Iterable[Model]) -> Dict[Type[Model], List[UpdateOne]]:
+    """
+    按 Model 分组的写入操作，只更新 sync_at 未变的文档
+    """
+    result: Dict[Type[Model], List[UpdateOne]] = {}
+    for instance in models:
+        model = type(instance)
+        if not enabled(model):
+            continue
+        # 与文档中保存的格式一致（sync_at 经过 field_serializer）
+        stored = instance.model_dump_doc(include={"id", "sync_at"})
+        result.setdefault(model, []).append(
+            UpdateOne(
+                stored,
+                {
+                    "$set": {
+                        RENDERED_FIELD: build(instance),
+                        RENDERED_AT_FIELD: stored["sync_at"],
+                    }
+                },
+            )
+        )
+    return result
+
+
+def save_sync(engine, models: Iterable[Model]) -> int:
+    """
+    sync 保存模型后调用
+
+    Args:
+        engine (SyncEngine): odmantic SyncEngine
+
+    Returns:
+        int: 写入的文档数
+    """
+    count = 0
+    for model, operations in updates(models).items():
+        result = engine.get_collection(model).bulk_write(operations, ordered=False)
+        count += result.modified_count
+    return count
+
+
+def projection(model: Type[Model], fields: Iterable[str] = ()) -> Dict[str, int]:
+    """
+    读取预渲染内容需要的字段，fields 为调用方额外需要的字段
+    """
+    result = {RENDERED_FIELD: 1, RENDERED_AT_FIELD: 1, "sync_at": 1}
+    result.update({name: 1 for name in translated_fields(model)})
+    result.update({name: 1 for name in fields})
+    return result
+
+
+def is_valid(doc: Dict[str, Any]) -> bool:
+    return (
+        doc.get(RENDERED_FIELD) is not None
+        and doc.get(RENDERED_AT_FIELD) == doc.get("sync_at")
+    )
+
+
+def splice(model: Type[Model], doc: Dict[str, Any]) -> bytes:
+    """
+    把 translated_* 拼接到预渲染的 JSON 对象末尾
+    """
+    data = doc[RENDERED_FIELD]
+    extra = b"".join(
+        b"," + dumps(name) + b":" + dumps(doc.get(name))
+        for name in translated_fields(model)
+    )
+    return data[:-1] + extra + b"}" if extra else data
@@ -1,22 +1,34 @@
-from fastapi.responses import ORJSONResponse, Response
-from typing import Union, Optional
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from typing import Any, AsyncIterable, AsyncIterator, Union, Optional, List
 from pydantic import BaseModel
 import hashlib
-import orjson
 
-__ALL__ = ["BaseResponse", "TrustableResponse", "UncachedResponse", "ForceSyncResponse"]
+from app.utils.response.negotiation import (
+    MSGPACK,
+    MSGPACK_MEDIA_TYPE,
+    get_response_format,
+    packb,
+)
+from app.utils.response.raw import RawJSON, dumps
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+__ALL__ = ["BaseResponse", "TrustableResponse", "UncachedResponse", "ForceSyncResponse", "BadRequestResponse", "StreamingJSONResponse"]
 
 # Etag
-def generate_etag(content, status_code) -> str:
+def generate_etag(body: bytes, status_code: int) -> str:
     """
     Get Etag from response
 
-    SHA1 hash of the response content and status code
+    Hash of the rendered body and status code, xxh3_128 if xxhash is installed, otherwise SHA1
     """
-    hash_tool = hashlib.sha1()
-    hash_tool.update(orjson.dumps(content))
+    hash_tool = xxhash.xxh3_128() if xxhash is not None else hashlib.sha1()
+    hash_tool.update(body)
     hash_tool.update(str(status_code).encode())
-    return hash_tool.hexdigest()
+    return f'"{hash_tool.hexdigest()}"'
 
 class BaseResponse(ORJSONResponse):
     """
@@ -25,16 +37,25 @@ class BaseResponse(ORJSONResponse):
     用于返回 JSON 响应
 
     默认 Cache-Control: public, max-age=86400
+
+    content 只序列化一次，ETag 直接对渲染后的 body 计算
+
+    cache_tags 为响应包含的实体标签，sync 更新这些实体时响应缓存会被删除
+
+    请求 Accept: application/msgpack 时序列化为 MessagePack，见 app.utils.response.negotiation
+
+    content 中可以包含 RawJSON（预渲染的文档），序列化时直接拼接
     """
 
     def __init__(
         self,
         status_code: int = 200,
         content: Optional[Union[dict, BaseModel, list]] = None,
-        headers: dict = {},
+        headers: Optional[dict] = None,
+        cache_tags: Optional[List[str]] = None,
     ):
-        if content is None:
-            raw_content = None
+        headers = dict(headers) if headers else {}
+        raw_content = content
         # 自动序列化 BaseModel
         if isinstance(content, dict):
             raw_content = content
@@ -49,12 +70,20 @@ class BaseResponse(ORJSONResponse):
         # 默认 Cache-Control: public, max-age=86400
         if status_code == 200 and "Cache-Control" not in headers:
             headers["Cache-Control"] = "public, max-age=86400"
+        if get_response_format() == MSGPACK:
+            self.media_type = MSGPACK_MEDIA_TYPE
+
+        super().__init__(status_code=status_code, content=raw_content, headers=headers)
 
         # Etag
-        if raw_content is not None and status_code == 200:
-            headers["Etag"] = generate_etag(raw_content, status_code=status_code)
+        if raw_content is not None and status_code == 200 and "etag" not in self.headers:
+            self.headers["Etag"] = generate_etag(self.body, status_code=status_code)
+        self.cache_tags = cache_tags or []
 
-        super().__init__(status_code=status_code, content=raw_content, headers=headers)
+    def render(self, content: Any) -> bytes:
+        if self.media_type == MSGPACK_MEDIA_TYPE:
+            return packb(content)
+        return dumps(content)
 
 
 class TrustableResponse(BaseResponse):
@@ -66,15 +95,18 @@ class TrustableResponse(BaseResponse):
         self,
         status_code: int = 200,
         content: Union[dict, BaseModel, list] = None,
-        headers: dict = {},
+        headers: Optional[dict] = None,
         trustable: bool = True,
+        cache_tags: Optional[List[str]] = None,
     ):
+        headers = dict(headers) if headers else {}
         headers["Trustable"] = "True" if trustable else "False"
 
         super().__init__(
             status_code=status_code,
             content=content,
             headers=headers,
+            cache_tags=cache_tags,
         )
 
 
@@ -83,7 +115,7 @@ class UncachedResponse(BaseResponse):
     A response that indicates that the content is not cached.
     """
 
-    def __init__(self, status_code: int = 404, headers: dict = {}):
+    def __init__(self, status_code: int = 404, headers: Optional[dict] = None):
         headers = {"Trustable": "False"}
 
         super().__init__(status_code=status_code, headers=headers)
@@ -98,3 +130,67 @@ class ForceSyncResponse(BaseResponse):
         headers = {"Trustable": "False"}
 
         super().__init__(status_code=status_code, headers=headers)
+
+
+class BadRequestResponse(BaseResponse):
+    """
+    A response that indicates that the request parameters are invalid.
+    """
+
+    def __init__(self, message: str, status_code: int = 400):
+        headers = {"Cache-Control": "no-cache"}
+
+        super().__init__(
+            status_code=status_code,
+            content={"code": status_code, "message": message},
+            headers=headers,
+        )
+
+
+class StreamingJSONResponse(StreamingResponse):
+    """
+    逐条序列化的 JSON 数组响应
+
+    items 一般来自 MongoDB 游标，攒够 chunk_size 字节发送一次，内存占用与列表长度无关
+    cache 装饰器会边发送边缓冲，小于 streaming.max_cache_size 时写入缓存
+    总是输出 JSON，请求 msgpack 时不要使用
+    """
+
+    def __init__(
+        self,
+        items: AsyncIterable[Any],
+        status_code: int = 200,
+        headers: Optional[dict] = None,
+        trustable: bool = True,
+        chunk_size: int = 1024 * 64,
+        cache_tags: Optional[List[str]] = None,
+    ):
+        headers = dict(headers) if headers else {}
+        headers["Trustable"] = "True" if trustable else "False"
+        if status_code == 200 and "Cache-Control" not in headers:
+            headers["Cache-Control"] = "public, max-age=86400"
+
+        super().__init__(
+            content=self.render_items(items, chunk_size),
+            status_code=status_code,
+            headers=headers,
+            media_type="application/json",
+        )
+        self.cache_tags = cache_tags or []
+
+    @staticmethod
+    async def render_items(
+        items: AsyncIterable[Any], chunk_size: int
+    ) -> AsyncIterator[bytes]:
+        buffer = bytearray(b"[")
+        first = True
+        async for item in items:
+            if not first:
+                buffer += b","
+            buffer += dumps(item)
+            first = False
+            if len(buffer) >= chunk_size:
+                yield bytes(buffer)
+                buffer.clear()
+        buffer += b"]"
+        yield bytes(buffer)
@@ -0,0 +1,86 @@
+"""
+响应格式协商
+
+请求 Accept 中包含 application/msgpack 时返回 MessagePack，其他情况返回 JSON
+msgpack 为可选依赖，未安装时总是返回 JSON
+
+格式保存在 contextvar 中，由 ResponseFormatMiddleware 按请求设置，
+BaseResponse 序列化和缓存 key 都从这里读取
+"""
+
+from contextvars import ContextVar, Token
+from datetime import date, datetime
+from typing import Any, Optional
+
+import orjson
+from pydantic import BaseModel
+
+from app.config.mcim import MCIMConfig
+from app.utils.compression import parse_accept_encoding
+from app.utils.response.raw import RawJSON
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+mcim_config = MCIMConfig.load()
+
+JSON = "json"
+MSGPACK = "msgpack"
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+# 客户端常见的几种写法
+MSGPACK_MEDIA_TYPES = (
+    "application/msgpack",
+    "application/x-msgpack",
+    "application/vnd.msgpack",
+)
+
+response_format: ContextVar[str] = ContextVar("response_format", default=JSON)
+
+
+def msgpack_available() -> bool:
+    return msgpack is not None and mcim_config.msgpack
+
+
+def negotiate_format(accept: Optional[str]) -> str:
+    """
+    明确接受 msgpack 且 q 值不低于 application/json 时返回 msgpack
+    """
+    if not accept or not msgpack_available():
+        return JSON
+    accepted = parse_accept_encoding(accept)
+    msgpack_q = max(accepted.get(media_type, 0.0) for media_type in MSGPACK_MEDIA_TYPES)
+    if msgpack_q > 0 and msgpack_q >= accepted.get("application/json", 0.0):
+        return MSGPACK
+    return JSON
+
+
+def get_response_format() -> str:
+    return response_format.get()
+
+
+def set_response_format(value: str) -> Token:
+    return response_format.set(value)
+
+
+def reset_response_format(token: Token) -> None:
+    response_format.reset(token)
+
+
+def _default(obj: Any) -> Any:
+    # 与 orjson 的输出保持一致
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    elif isinstance(obj, RawJSON):
+        return orjson.loads(obj.data)
+    elif isinstance(obj, BaseModel):
+        return obj.model_dump()
+    elif isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not msgpack serializable")
+
+
+def packb(content: Any) -> bytes:
+    return msgpack.packb(content, default=_default, use_bin_type=True)
@@ -0,0 +1,65 @@
+"""
+预先序列化好的 JSON 片段
+
+RawJSON 可以出现在响应的任意位置（顶层、列表、dict 的值，任意嵌套），
+dumps 时原样拼接，不再逐字段序列化
+"""
+
+from typing import Any
+
+import orjson
+
+# 与 ORJSONResponse 一致
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+class RawJSON:
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+
+def _contains_raw(value: Any) -> bool:
+    if isinstance(value, RawJSON):
+        return True
+    elif isinstance(value, (list, tuple)):
+        return any(_contains_raw(item) for item in value)
+    elif isinstance(value, dict):
+        return any(_contains_raw(item) for item in value.values())
+    return False
+
+
+def _dumps_key(key: Any) -> bytes:
+    return orjson.dumps(key if isinstance(key, str) else str(key))
+
+
+def _splice(content: Any) -> bytes:
+    if isinstance(content, RawJSON):
+        return content.data
+    elif isinstance(content, (list, tuple)):
+        return b"[" + b",".join(dumps(item) for item in content) + b"]"
+    elif isinstance(content, dict):
+        return (
+            b"{"
+            + b",".join(
+                _dumps_key(key) + b":" + dumps(value) for key, value in content.items()
+            )
+            + b"}"
+        )
+    return orjson.dumps(content, option=ORJSON_OPTIONS)
+
+
+def dumps(content: Any) -> bytes:
+    if isinstance(content, RawJSON):
+        return content.data
+    elif isinstance(content, list) and any(isinstance(item, RawJSON) for item in content):
+        # reader 返回的列表，直接拼接
+        return _splice(content)
+    try:
+        return orjson.dumps(content, option=ORJSON_OPTIONS)
+    except orjson.JSONEncodeError:
+        # 没有 RawJSON 的结构不多遍历一次；嵌套的 RawJSON 会让 orjson 报错，此时逐层拼接
+        if not _contains_raw(content):
+            raise
+    return _splice(content)
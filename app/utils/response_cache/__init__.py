@@ -1,22 +1,47 @@
-import orjson
+import time
 from functools import wraps
-from typing import Optional
-from fastapi.responses import Response
+from itertools import chain
+from typing import List, Optional, Tuple
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
 from redis.asyncio import Redis
 from app.utils.response_cache.key_builder import default_key_builder, KeyBuilder
-from app.utils.response_cache.resp_builder import ResponseBuilder
+from app.utils.compression import settings_for
+from app.utils.response_cache.resp_builder import ResponseBuilder, CachedResponse
+from app.utils.response_cache.lru import LRUCache
+from app.utils.response_cache import singleflight
+from app.utils.response_cache.tags import add_tags
+from app.utils.response_cache import generation
 from app.utils.loger import log
 from app.config.redis import RedisdbConfig
-from app.utils.metric import REDIS_CACHE_HIT_GAUGE
+from app.config.mcim import MCIMConfig
+from app.utils.metric import (
+    RESPONSE_CACHE_HIT_COUNT,
+    RESPONSE_CACHE_MISS_COUNT,
+    RESPONSE_CACHE_BYPASS_COUNT,
+    RESPONSE_CACHE_SERVED_BYTES,
+    RESPONSE_CACHE_REDIS_GET_LATENCY,
+    RESPONSE_CACHE_ENCODE_TIME,
+    RESPONSE_CACHE_DECODE_TIME,
+    RESPONSE_CACHE_BODY_SIZE,
+)
 
 redis_config = RedisdbConfig.load()
+mcim_config = MCIMConfig.load()
+single_flight_config = mcim_config.single_flight
+compression_config = mcim_config.compression
+streaming_config = mcim_config.streaming
 
 
 class Cache:
     backend: Redis
     enabled: bool = False
+    # 带代际的 namespace，base_namespace 为不带代际的前缀
     namespace: str = "fastapi_cache"
+    base_namespace: str = "fastapi_cache"
+    generation: Optional[str] = None
     key_builder: KeyBuilder = default_key_builder
+    l1: Optional[LRUCache] = None
 
     @classmethod
     def init(
@@ -38,50 +63,403 @@ class Cache:
         )
         cls.enabled = enabled
         cls.namespace = namespace
+        cls.base_namespace = namespace
         cls.key_builder = key_builder
+        cls.l1 = (
+            LRUCache(
+                max_size=mcim_config.l1_cache.max_size,
+                ttl=mcim_config.l1_cache.ttl,
+            )
+            if mcim_config.l1_cache.enabled
+            else None
+        )
+
+    @classmethod
+    async def init_generation(cls) -> str:
+        """
+        读取缓存代际并切换 namespace，后台清理旧代际
+        """
+        cls.generation = await generation.get_generation(
+            cls.backend, cls.base_namespace, pinned=mcim_config.cache_generation
+        )
+        cls.namespace = generation.generation_namespace(
+            cls.base_namespace, cls.generation
+        )
+        singleflight.background(
+            generation.cleaned_key(cls.base_namespace),
+            lambda: generation.cleanup_old_generations(
+                cls.backend, cls.base_namespace, cls.generation
+            ),
+        )
+        log.info(f"Cache generation: {cls.generation}")
+        return cls.generation
+
+
+def get_request(args: tuple, kwargs: dict) -> Optional[Request]:
+    for value in chain(args, kwargs.values()):
+        if isinstance(value, Request):
+            return value
+    return None
+
+
+def get_header(request: Optional[Request], name: str) -> Optional[str]:
+    if request is None:
+        return None
+    return request.headers.get(name)
+
+
+def get_if_none_match(request: Optional[Request]) -> Optional[str]:
+    # 只有 GET / HEAD 可以返回 304
+    if request is None or request.method not in ("GET", "HEAD"):
+        return None
+    return request.headers.get("if-none-match")
+
+
+def buffered_response(
+    response: StreamingResponse, chunks: List[bytes]
+) -> Response:
+    """
+    用缓冲下来的 body 还原出普通 Response，用于写入缓存
+    """
+    headers = {
+        name: value
+        for name, value in response.headers.items()
+        if name != "content-length"
+    }
+    buffered = Response(
+        content=b"".join(chunks), status_code=response.status_code, headers=headers
+    )
+    buffered.cache_tags = getattr(response, "cache_tags", None)
+    return buffered
+
 
+def is_cacheable_stream(response: StreamingResponse) -> bool:
+    return response.status_code < 400 and "no-cache" not in response.headers.get(
+        "cache-control", ""
+    )
 
-def cache(expire: Optional[int] = 60, never_expire: Optional[bool] = False):
+
+async def collect_streaming(response: StreamingResponse) -> Optional[Response]:
+    """
+    读完整个流，超过 streaming.max_cache_size 返回 None
+    """
+    chunks, size = [], 0
+    async for chunk in response.body_iterator:
+        if isinstance(chunk, str):
+            chunk = chunk.encode(response.charset)
+        size += len(chunk)
+        if size > streaming_config.max_cache_size:
+            return None
+        chunks.append(chunk)
+    return buffered_response(response, chunks)
+
+
+def get_front_key(request: Optional[Request]) -> Optional[str]:
+    """
+    CacheFrontMiddleware 未命中时写入的 key，由装饰器一并填充
+    """
+    if request is None:
+        return None
+    return request.scope.get("state", {}).get("cache_front_key")
+
+
+def cache(
+    expire: Optional[int] = 60,
+    never_expire: Optional[bool] = False,
+    l1: Optional[bool] = False,
+    stale_ttl: Optional[int] = None,
+):
+    """
+    Redis 响应缓存
+
+    同一个 key 的并发 miss 会被合并，只有一个请求真正执行
+
+    Args:
+        expire (int): 过期时间，秒
+
+        never_expire (bool): 不过期
+
+        l1 (bool): 同时缓存在进程内 L1，只给热点路由开启
+
+        stale_ttl (int): 过期后仍可返回旧值的时间，秒，期间在后台刷新
+    """
     if not isinstance(expire, int):
         raise ValueError("expire must be an integer")
+    if stale_ttl is not None and not isinstance(stale_ttl, int):
+        raise ValueError("stale_ttl must be an integer")
 
     def decorator(func):
+        func_name = f"{func.__module__}:{func.__name__}"
+        # Redis 中保留到 stale 窗口结束
+        redis_ttl = expire + stale_ttl if stale_ttl else expire
+        l1_ttl = None if never_expire else redis_ttl
+
+        async def get_cached(key: str) -> Tuple[Optional[CachedResponse], str]:
+            """
+            Returns:
+                Tuple[Optional[CachedResponse], str]: 缓存值和命中的层级
+            """
+            if l1 and Cache.l1 is not None:
+                value = Cache.l1.get(key)
+                if value is not None:
+                    return value, "l1"
+
+            start = time.perf_counter()
+            value = await Cache.backend.get(key)
+            RESPONSE_CACHE_REDIS_GET_LATENCY.labels(func_name).observe(
+                time.perf_counter() - start
+            )
+            if value is None:
+                return None, "redis"
+            return load_cached(key, value), "redis"
+
+        def is_stale(value: CachedResponse) -> bool:
+            return value.expire_at is not None and value.expire_at <= time.time()
+
+        def load_cached(key: str, value: bytes) -> Optional[CachedResponse]:
+            start = time.perf_counter()
+            value = ResponseBuilder.load(value)
+            RESPONSE_CACHE_DECODE_TIME.labels(func_name).observe(
+                time.perf_counter() - start
+            )
+            if value is None:
+                return None
+            log.debug(f"Cached response: [{key}]")
+            if l1 and Cache.l1 is not None:
+                Cache.l1.set(key, value, size=value.size, ttl=l1_ttl)
+            return value
+
+        async def set_front(front_key: str, value: CachedResponse) -> None:
+            """
+            装饰器命中但 front 未命中时补写 front key，剩余过期时间与原条目一致
+
+            条目中保存了缓存标签，front key 同样记到标签集合里，sync 后一起失效
+            """
+            if value.expire_at is None:
+                ttl = None
+            else:
+                ttl = int(value.expire_at - time.time()) + (stale_ttl or 0)
+                if ttl <= 0:
+                    return
+            if l1 and Cache.l1 is not None:
+                Cache.l1.set(front_key, value, size=value.size, ttl=l1_ttl)
+            await Cache.backend.set(front_key, value.data, ex=ttl)
+            if value.tags:
+                await add_tags(Cache.backend, [front_key], value.tags, expire=ttl)
+
+        async def set_cached(
+            key: str, result: Response, request: Optional[Request] = None
+        ) -> Optional[CachedResponse]:
+            # 3xx 重定向也缓存
+            if result.status_code >= 400:
+                RESPONSE_CACHE_BYPASS_COUNT.labels(func_name, "non_200").inc()
+                return None
+            elif "Cache-Control" in result.headers:
+                if "no-cache" in result.headers["Cache-Control"]:
+                    RESPONSE_CACHE_BYPASS_COUNT.labels(func_name, "no_cache").inc()
+                    return None
+
+            cache_tags = getattr(result, "cache_tags", None)
+            start = time.perf_counter()
+            value = ResponseBuilder.encode(
+                result,
+                tags=cache_tags or (),
+                compress=compression_config.cache_variants,
+                expire_at=None if never_expire else time.time() + expire,
+                settings=settings_for(
+                    request.url.path if request is not None else None
+                ),
+            )
+            RESPONSE_CACHE_ENCODE_TIME.labels(func_name).observe(
+                time.perf_counter() - start
+            )
+            RESPONSE_CACHE_BODY_SIZE.labels(func_name).observe(len(value))
+
+            front_key = get_front_key(request)
+            keys = [key] if front_key is None else [key, front_key]
+            async with Cache.backend.pipeline(transaction=False) as pipe:
+                for to_set_key in keys:
+                    if never_expire:
+                        pipe.set(to_set_key, value)
+                    else:
+                        pipe.set(to_set_key, value, ex=redis_ttl)
+                await pipe.execute()
+            log.debug(f"Set cache: [{key}]")
+            if cache_tags:
+                await add_tags(
+                    Cache.backend,
+                    keys,
+                    cache_tags,
+                    expire=None if never_expire else redis_ttl,
+                )
+            to_set = ResponseBuilder.load(value)
+            if l1 and Cache.l1 is not None:
+                for to_set_key in keys:
+                    Cache.l1.set(to_set_key, to_set, size=to_set.size, ttl=l1_ttl)
+            return to_set
+
+        async def revalidate(key: str, args: tuple, kwargs: dict) -> None:
+            # 其他 worker 已经在刷新
+            token = await singleflight.acquire_lock(
+                Cache.backend, key, timeout=single_flight_config.lock_timeout
+            )
+            if token is None:
+                return
+            try:
+                result = await func(*args, **kwargs)
+                if isinstance(result, StreamingResponse):
+                    result = await collect_streaming(result)
+                if isinstance(result, Response):
+                    await set_cached(key, result, get_request(args, kwargs))
+                log.debug(f"Revalidated cache: [{key}]")
+            except Exception as e:
+                log.warning(f"Revalidate cache failed: [{key}] {e}")
+            finally:
+                await singleflight.release_lock(Cache.backend, key, token)
+
+        def tee_streaming(
+            key: str,
+            result: StreamingResponse,
+            request: Optional[Request],
+            token: Optional[str] = None,
+        ) -> bool:
+            """
+            流式响应边发送边缓冲，发送完成后写入缓存，超过 max_cache_size 放弃缓存
+
+            Args:
+                token (str): single flight 的 Redis 锁，持有到写入缓存之后再释放，
+                    其他 worker 在此期间等待缓存而不是各自回源
+
+            Returns:
+                bool: 是否接管了 token，不缓存时由调用方释放
+            """
+            if not is_cacheable_stream(result):
+                RESPONSE_CACHE_BYPASS_COUNT.labels(func_name, "non_200").inc()
+                return False
+            iterator = result.body_iterator
+
+            async def release():
+                nonlocal token
+                if token is not None:
+                    await singleflight.release_lock(Cache.backend, key, token)
+                    token = None
+
+            async def tee():
+                chunks, size = [], 0
+                try:
+                    async for chunk in iterator:
+                        if isinstance(chunk, str):
+                            chunk = chunk.encode(result.charset)
+                        if chunks is not None:
+                            size += len(chunk)
+                            if size > streaming_config.max_cache_size:
+                                chunks = None
+                                RESPONSE_CACHE_BYPASS_COUNT.labels(
+                                    func_name, "too_large"
+                                ).inc()
+                                # 不会写入缓存，不再让其他 worker 等待
+                                await release()
+                            else:
+                                chunks.append(chunk)
+                        yield chunk
+                    if chunks is not None:
+                        try:
+                            await set_cached(
+                                key, buffered_response(result, chunks), request
+                            )
+                        except Exception as e:
+                            log.warning(f"Set streaming cache failed: [{key}] {e}")
+                finally:
+                    await release()
+
+            result.body_iterator = tee()
+            return True
+
+        def serve(
+            value: CachedResponse, layer: str, request: Optional[Request]
+        ) -> Response:
+            response = ResponseBuilder.decode(
+                value,
+                accept_encoding=get_header(request, "accept-encoding"),
+                if_none_match=get_if_none_match(request),
+            )
+            RESPONSE_CACHE_HIT_COUNT.labels(func_name, layer).inc()
+            RESPONSE_CACHE_SERVED_BYTES.labels(func_name).inc(len(response.body))
+            return response
+
         @wraps(func)
         async def wrapper(*args, **kwargs):
-            if kwargs.get("force") is True or not Cache.enabled:
+            if kwargs.get("force") is True:
+                RESPONSE_CACHE_BYPASS_COUNT.labels(func_name, "force").inc()
+                return await func(*args, **kwargs)
+            elif not Cache.enabled:
+                RESPONSE_CACHE_BYPASS_COUNT.labels(func_name, "disabled").inc()
                 return await func(*args, **kwargs)
             key = default_key_builder(
                 func, namespace=Cache.namespace, args=args, kwargs=kwargs
             )
-            value = await Cache.backend.get(key)
+            request = get_request(args, kwargs)
+            front_key = get_front_key(request)
 
+            value, layer = await get_cached(key)
             if value is not None:
-                value = orjson.loads(value)
-                log.debug(f"Cached response: [{key}]")
-                REDIS_CACHE_HIT_GAUGE.labels(f'{func.__module__}:{func.__name__}').inc()
-                return ResponseBuilder.decode(value)
-
-            result = await func(*args, **kwargs)
-            REDIS_CACHE_HIT_GAUGE.labels(f'{func.__module__}:{func.__name__}').dec()
-            if isinstance(result, Response):
-                if result.status_code >= 400:
-                    return result
-                elif "Cache-Control" in result.headers:
-                    if "no-cache" in result.headers["Cache-Control"]:
-                        return result
-
-                to_set = ResponseBuilder.encode(result)
-            else:
-                return result
-            value = orjson.dumps(to_set)
+                if not is_stale(value):
+                    if front_key is not None:
+                        await set_front(front_key, value)
+                    return serve(value, layer, request)
+                elif stale_ttl:
+                    # 先返回旧值，后台刷新
+                    singleflight.background(
+                        key, lambda: revalidate(key, args, kwargs)
+                    )
+                    return serve(value, "stale", request)
 
-            if never_expire:
-                await Cache.backend.set(key, value)
-            else:
-                await Cache.backend.set(key, value, ex=expire)
-            log.debug(f"Set cache: [{key}]")
+            async def compute():
+                token = None
+                if single_flight_config.enabled:
+                    token = await singleflight.acquire_lock(
+                        Cache.backend, key, timeout=single_flight_config.lock_timeout
+                    )
+                    if token is None:
+                        # 其他 worker 正在计算，等它写入缓存
+                        value = await singleflight.wait_for_value(
+                            Cache.backend,
+                            key,
+                            timeout=single_flight_config.lock_timeout,
+                            poll_interval=single_flight_config.poll_interval,
+                        )
+                        if value is not None:
+                            return None, load_cached(key, value)
+                try:
+                    RESPONSE_CACHE_MISS_COUNT.labels(func_name).inc()
+                    result = await func(*args, **kwargs)
+                    if not isinstance(result, Response):
+                        return result, None
+                    if isinstance(result, StreamingResponse):
+                        # 流式响应还没生成 body，同进程的等待者各自执行；
+                        # Redis 锁交给 tee，发送完成并写入缓存后释放
+                        if tee_streaming(key, result, request, token):
+                            token = None
+                        return result, None
+                    shared = await set_cached(key, result, request)
+                    if shared is None:
+                        # 不缓存的响应也分给同进程的等待者，避免它们再查一遍
+                        shared = ResponseBuilder.load(ResponseBuilder.encode(result))
+                    return result, shared
+                finally:
+                    if token is not None:
+                        await singleflight.release_lock(Cache.backend, key, token)
 
-            return result
+            if not single_flight_config.enabled:
+                result, _ = await compute()
+                return result
+
+            result, shared = await singleflight.do(key, compute)
+            if result is not None:
+                return result
+            if shared is not None:
+                return serve(shared, "shared", request)
+            return await func(*args, **kwargs)
 
         return wrapper
 
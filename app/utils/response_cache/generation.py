@@ -0,0 +1,136 @@
+"""
+缓存代际
+
+所有缓存 key 都在 {namespace}:gen:{generation} 下，代际保存在 Redis 的 {namespace}:generation
+worker 启动只读取当前代际，不再清空 Redis；需要整体作废缓存时显式提升代际：
+
+    python -m scripts.bump_cache_generation
+
+也可以在配置里固定 cache_generation（比如部署时写入代码 hash），此时以配置为准
+
+旧代际的 key 由一个 worker 在后台分批 SCAN + UNLINK 清理；滚动重启时还没重启的 worker
+仍在读写上一代际，所以只清理更早的代际，上一代际留到 TTL 过期或下次提升代际时清理
+"""
+
+import asyncio
+from typing import Optional
+
+from redis import Redis
+from redis.asyncio import Redis as AioRedis
+
+from app.utils.response_cache import singleflight
+from app.utils.loger import log
+
+INITIAL_GENERATION = "1"
+
+CLEANUP_BATCH = 500
+CLEANUP_INTERVAL = 0.01  # 秒，每批之间让出 Redis
+CLEANUP_LOCK_TIMEOUT = 600
+
+
+def generation_key(namespace: str) -> str:
+    return f"{namespace}:generation"
+
+
+def previous_key(namespace: str) -> str:
+    return f"{namespace}:generation:previous"
+
+
+def highest_key(namespace: str) -> str:
+    return f"{namespace}:generation:highest"
+
+
+def cleaned_key(namespace: str) -> str:
+    return f"{namespace}:generation:cleaned"
+
+
+def generation_namespace(namespace: str, generation: str) -> str:
+    return f"{namespace}:gen:{generation}"
+
+
+async def get_generation(
+    backend: AioRedis, namespace: str, pinned: Optional[str] = None
+) -> str:
+    """
+    读取当前代际，不存在则初始化
+
+    Args:
+        pinned (str): 配置中固定的代际，会写回 Redis 供其他进程读取
+    """
+    key = generation_key(namespace)
+    if pinned:
+        previous = await backend.getset(key, pinned)
+        if previous is not None and previous != pinned.encode():
+            await backend.set(previous_key(namespace), previous)
+            # 记下被替换的数字代际，再切回数字代际时从它之后继续
+            highest = await backend.get(highest_key(namespace))
+            if previous.isdigit() and int(previous) > int(highest or 0):
+                await backend.set(highest_key(namespace), previous)
+        return pinned
+    await backend.set(key, INITIAL_GENERATION, nx=True)
+    generation = await backend.get(key)
+    return generation.decode() if isinstance(generation, bytes) else generation
+
+
+def bump_generation(backend: Redis, namespace: str) -> str:
+    """
+    提升代际，返回新代际；已运行的 worker 在重启后切换
+    """
+    key = generation_key(namespace)
+    current = backend.get(key)
+    previous = backend.get(previous_key(namespace))
+    if current is not None:
+        backend.set(previous_key(namespace), current)
+    # 之前固定过非数字的代际（如代码 hash）时，从用过的最大数字代际继续，不会回到仍保留数据的旧代际
+    used = [
+        int(value)
+        for value in (current, previous, backend.get(highest_key(namespace)))
+        if value is not None and value.isdigit()
+    ]
+    generation = max(used, default=0) + 1
+    backend.set(key, generation)
+    backend.set(highest_key(namespace), generation)
+    return str(generation)
+
+
+async def cleanup_old_generations(
+    backend: AioRedis, namespace: str, generation: str
+) -> int:
+    """
+    删除当前代际和上一代际以外的缓存 key，同一代际只清理一次
+    """
+    if (await backend.get(cleaned_key(namespace))) == generation.encode():
+        return 0
+    token = await singleflight.acquire_lock(
+        backend, cleaned_key(namespace), CLEANUP_LOCK_TIMEOUT
+    )
+    if token is None:
+        # 其他 worker 正在清理
+        return 0
+
+    previous = await backend.get(previous_key(namespace))
+    kept_prefixes = tuple(
+        f"{generation_namespace(namespace, kept)}:".encode()
+        for kept in (generation, previous.decode() if previous else None)
+        if kept
+    )
+    count = 0
+    try:
+        batch = []
+        async for key in backend.scan_iter(
+            match=f"{generation_namespace(namespace, '*')}", count=CLEANUP_BATCH
+        ):
+            if key.startswith(kept_prefixes):
+                continue
+            batch.append(key)
+            if len(batch) >= CLEANUP_BATCH:
+                count += await backend.unlink(*batch)
+                batch = []
+                await asyncio.sleep(CLEANUP_INTERVAL)
+        if batch:
+            count += await backend.unlink(*batch)
+        await backend.set(cleaned_key(namespace), generation)
+    finally:
+        await singleflight.release_lock(backend, cleaned_key(namespace), token)
+    log.info(f"Cleaned {count} cache keys of old generations")
+    return count
@@ -0,0 +1,70 @@
+"""
+批量 POST 接口的单项缓存
+
+整个请求体作为 key 几乎不会命中，所以按 id / hash 单独缓存每一项，
+一次 MGET 取回已缓存的部分，只有缺失的部分去查 MongoDB
+"""
+
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional
+
+import orjson
+
+from app.utils.response_cache import Cache
+from app.utils.response.raw import dumps
+from app.utils.response_cache.tags import tag_key
+from app.utils.loger import log
+
+
+def item_key(namespace: str, kind: str, item_id: Hashable) -> str:
+    return f"{namespace}:item:{kind}:{item_id}"
+
+
+async def get_items(kind: str, ids: Iterable[Hashable]) -> Dict[Hashable, Any]:
+    """
+    Args:
+        kind (str): 缓存类型，如 cf:mod
+
+        ids (Iterable[Hashable]): id 列表
+
+    Returns:
+        Dict[Hashable, Any]: 命中的 id -> 值
+    """
+    ids = list(dict.fromkeys(ids))
+    if not Cache.enabled or not ids:
+        return {}
+    values = await Cache.backend.mget(
+        [item_key(Cache.namespace, kind, item_id) for item_id in ids]
+    )
+    result = {
+        item_id: orjson.loads(value)
+        for item_id, value in zip(ids, values)
+        if value is not None
+    }
+    log.debug(f"Item cache [{kind}] hit {len(result)}/{len(ids)}")
+    return result
+
+
+async def set_items(
+    kind: str,
+    items: Dict[Hashable, Any],
+    expire: int,
+    tags: Optional[Callable[[Hashable, Any], Iterable[str]]] = None,
+) -> None:
+    """
+    Args:
+        items (Dict[Hashable, Any]): id -> 值，值可以是 RawJSON
+
+        tags (Callable[[Hashable, Any], Iterable[str]]): 根据 id 和值返回缓存标签，用于 sync 后失效
+    """
+    if not Cache.enabled or not items:
+        return
+    async with Cache.backend.pipeline(transaction=False) as pipe:
+        for item_id, value in items.items():
+            key = item_key(Cache.namespace, kind, item_id)
+            pipe.set(key, dumps(value), ex=expire)
+            if tags is not None:
+                for tag in tags(item_id, value):
+                    pipe.sadd(tag_key(tag), key)
+                    pipe.expire(tag_key(tag), expire, nx=True)
+                    pipe.expire(tag_key(tag), expire, gt=True)
+        await pipe.execute()
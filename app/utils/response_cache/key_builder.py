@@ -3,6 +3,8 @@ import hashlib
 from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, Union
 from typing_extensions import Protocol
 
+from app.utils.response.negotiation import JSON, get_response_format
+
 _Func = Callable[..., Any]
 
 IGNORE_KWARGS = "requests"
@@ -12,6 +14,11 @@ def filter_kwargs(kwargs: Dict[str, Any], keys: Tuple[str, ...]) -> Dict[str, An
     return {k: v for k, v in kwargs.items() if k not in keys}
 
 
+def format_suffix(response_format: str) -> str:
+    # JSON 保持原来的 key 不变
+    return "" if response_format == JSON else f":{response_format}"
+
+
 class KeyBuilder(Protocol):
     def __call__(
         self,
@@ -31,11 +38,28 @@ def default_key_builder(
     kwargs: Dict[str, Any],
 ) -> str:
     cache_key = hashlib.md5(  # noqa: S324
-        f"{func.__module__}:{func.__name__}:{args}:{filter_kwargs(kwargs, IGNORE_KWARGS)}".encode()
+        f"{func.__module__}:{func.__name__}:{args}:{filter_kwargs(kwargs, IGNORE_KWARGS)}{format_suffix(get_response_format())}".encode()
     ).hexdigest()
     return f"{namespace}:{cache_key}"
 
 
+def request_key_builder(
+    method: str,
+    path: str,
+    query_string: str,
+    namespace: str = "",
+    response_format: str = JSON,
+) -> str:
+    """
+    cache front 用的 key，只看 method + path + 排序后的 query + 响应格式，不经过路由
+    """
+    query = "&".join(sorted(query_string.split("&"))) if query_string else ""
+    cache_key = hashlib.md5(  # noqa: S324
+        f"{method}:{path}?{query}{format_suffix(response_format)}".encode()
+    ).hexdigest()
+    return f"{namespace}:front:{cache_key}"
+
+
 # def xxhash_key_builder(
 #     func: Callable[..., Any],
 #     namespace: str = "",
@@ -0,0 +1,59 @@
+"""
+进程内 L1 缓存
+
+每个 gunicorn worker 各自持有一份，放在 Redis 前面，命中时省掉一次 Redis 往返
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+
+
+class LRUCache:
+    """
+    按字节数限制容量的 LRU + TTL 缓存
+
+    只在单个事件循环里使用，不加锁
+    """
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.size = 0
+        # key -> (expire_at, size, value)
+        self._data: "OrderedDict[str, Tuple[float, int, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expire_at, _, value = item
+        if expire_at <= time.monotonic():
+            self.delete(key)
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, size: int, ttl: Optional[int] = None) -> None:
+        # 单个过大的值不进 L1，避免把整个缓存冲掉
+        if size > self.max_size // 8:
+            return
+        self.delete(key)
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        self._data[key] = (time.monotonic() + ttl, size, value)
+        self.size += size
+        while self.size > self.max_size:
+            _, (_, old_size, _) = self._data.popitem(last=False)
+            self.size -= old_size
+
+    def delete(self, key: str) -> None:
+        item = self._data.pop(key, None)
+        if item is not None:
+            self.size -= item[1]
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.size = 0
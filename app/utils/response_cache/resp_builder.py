@@ -1,5 +1,100 @@
+"""
+响应缓存的二进制封装
+
+    | magic "MC" | version u8 | flags u8 | status u16 | expire_at f64 | n_headers u16 | n_variants u8 | n_tags u16 |
+    | n_headers x (name_len u16, value_len u16, name, value) |
+    | n_tags x (tag_len u16, tag) |
+    | (n_variants + 1) x (encoding_len u8, encoding, length u32) |
+    | body | variant 1 | variant 2 | ...
+
+body 和压缩版本原样拼接在末尾，读取时只解析头部，直接切片拿 body
+第一个 variant 固定为未压缩的 body，encoding 为空
+tags 为响应的缓存标签，补写 front key 时用来把它也记到标签集合里
+"""
+
+import struct
+from typing import Dict, Iterable, List, Optional, Tuple
 from fastapi.responses import Response
 
+from app.utils.compression import (
+    CompressionSettings,
+    DEFAULT_SETTINGS,
+    compress_all,
+    negotiate,
+)
+from app.utils.response import generate_etag
+
+MAGIC = b"MC"
+VERSION = 2
+
+FLAG_EXPIRE_AT = 1
+
+_HEADER = struct.Struct("!2sBBHdHBH")
+_HEADER_ITEM = struct.Struct("!HH")
+_TAG_LENGTH = struct.Struct("!H")
+_VARIANT_NAME = struct.Struct("!B")
+_VARIANT_LENGTH = struct.Struct("!I")
+
+
+class CachedResponse:
+    """
+    解析后的缓存条目，body 只记录偏移量，用到时再切片
+    """
+
+    __slots__ = ("data", "status_code", "expire_at", "headers", "variants", "tags")
+
+    def __init__(
+        self,
+        data: bytes,
+        status_code: int,
+        expire_at: Optional[float],
+        headers: Dict[str, str],
+        variants: Dict[str, Tuple[int, int]],
+        tags: Optional[List[str]] = None,
+    ):
+        self.data = data
+        self.status_code = status_code
+        self.expire_at = expire_at
+        self.headers = headers
+        # encoding -> (offset, length)，"" 为未压缩
+        self.variants = variants
+        self.tags = tags or []
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+    @property
+    def encodings(self) -> List[str]:
+        return [encoding for encoding in self.variants if encoding]
+
+    @property
+    def etag(self) -> Optional[str]:
+        return self.headers.get("etag")
+
+    def body(self, encoding: str = "") -> bytes:
+        offset, length = self.variants[encoding]
+        return self.data[offset : offset + length]
+
+
+def etag_matches(etag: Optional[str], if_none_match: Optional[str]) -> bool:
+    """
+    If-None-Match 使用弱比较，忽略 W/ 前缀和引号
+    """
+    if not etag or not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    etag = etag.removeprefix("W/").strip('"')
+    return any(
+        tag.strip().removeprefix("W/").strip('"') == etag
+        for tag in if_none_match.split(",")
+    )
+
+
+# 304 只带这些头
+NOT_MODIFIED_HEADERS = ("etag", "cache-control", "vary", "expires", "trustable")
+
 
 class BaseBuilder:
     @classmethod
@@ -13,22 +108,161 @@ class BaseBuilder:
 
 class ResponseBuilder(BaseBuilder):
     @classmethod
-    def encode(cls, value: Response) -> bytes:
+    def encode(
+        cls,
+        value: Response,
+        compress: bool = False,
+        expire_at: Optional[float] = None,
+        settings: CompressionSettings = DEFAULT_SETTINGS,
+        tags: Iterable[str] = (),
+    ) -> bytes:
+        """
+        Args:
+            compress (bool): 同时保存 br / zstd / gzip 压缩后的 body，命中时按 Accept-Encoding 直接返回
+
+            expire_at (float): 过期时间戳，stale-while-revalidate 用
+
+            settings (CompressionSettings): 路由对应的压缩参数
+
+            tags (Iterable[str]): 缓存标签
+        """
         body: bytes = value.body
-        headers: dict = dict(value.headers)
-        status_code: int = value.status_code
+        headers = [
+            (name.encode("latin-1"), header_value.encode("latin-1"))
+            for name, header_value in value.headers.items()
+        ]
+        # ETag 只在写入缓存时计算一次，命中时用于 If-None-Match
+        if value.status_code == 200 and "etag" not in value.headers:
+            headers.append(
+                (b"etag", generate_etag(body, value.status_code).encode("latin-1"))
+            )
+        tags = [tag.encode("utf-8") for tag in tags]
+        variants = [("", body)]
+        if compress and "content-encoding" not in value.headers:
+            variants.extend(compress_all(body, settings).items())
+
+        parts = [
+            _HEADER.pack(
+                MAGIC,
+                VERSION,
+                FLAG_EXPIRE_AT if expire_at is not None else 0,
+                value.status_code,
+                expire_at or 0.0,
+                len(headers),
+                len(variants) - 1,
+                len(tags),
+            )
+        ]
+        for name, header_value in headers:
+            parts.append(_HEADER_ITEM.pack(len(name), len(header_value)))
+            parts.append(name)
+            parts.append(header_value)
+        for tag in tags:
+            parts.append(_TAG_LENGTH.pack(len(tag)))
+            parts.append(tag)
+        for encoding, data in variants:
+            encoding = encoding.encode("ascii")
+            parts.append(_VARIANT_NAME.pack(len(encoding)))
+            parts.append(encoding)
+            parts.append(_VARIANT_LENGTH.pack(len(data)))
+        parts.extend(data for _, data in variants)
+        return b"".join(parts)
+
+    @classmethod
+    def load(cls, data: bytes) -> Optional[CachedResponse]:
+        """
+        解析封装头部，不是当前格式的数据返回 None，按未命中处理
+        """
+        if len(data) < _HEADER.size or data[:2] != MAGIC:
+            return None
+        _, version, flags, status_code, expire_at, n_headers, n_variants, n_tags = (
+            _HEADER.unpack_from(data)
+        )
+        if version != VERSION:
+            return None
+
+        offset = _HEADER.size
+        headers = {}
+        for _ in range(n_headers):
+            name_length, value_length = _HEADER_ITEM.unpack_from(data, offset)
+            offset += _HEADER_ITEM.size
+            name = data[offset : offset + name_length].decode("latin-1")
+            offset += name_length
+            headers[name] = data[offset : offset + value_length].decode("latin-1")
+            offset += value_length
+
+        tags = []
+        for _ in range(n_tags):
+            (tag_length,) = _TAG_LENGTH.unpack_from(data, offset)
+            offset += _TAG_LENGTH.size
+            tags.append(data[offset : offset + tag_length].decode("utf-8"))
+            offset += tag_length
+
+        lengths = []
+        for _ in range(n_variants + 1):
+            (encoding_length,) = _VARIANT_NAME.unpack_from(data, offset)
+            offset += _VARIANT_NAME.size
+            encoding = data[offset : offset + encoding_length].decode("ascii")
+            offset += encoding_length
+            (length,) = _VARIANT_LENGTH.unpack_from(data, offset)
+            offset += _VARIANT_LENGTH.size
+            lengths.append((encoding, length))
 
-        params = {
-            "body": body.decode("utf-8"),
-            "headers": headers,
-            "status_code": status_code,
-        }
-        return params
+        variants = {}
+        for encoding, length in lengths:
+            variants[encoding] = (offset, length)
+            offset += length
+
+        return CachedResponse(
+            data=data,
+            status_code=status_code,
+            expire_at=expire_at if flags & FLAG_EXPIRE_AT else None,
+            headers=headers,
+            variants=variants,
+            tags=tags,
+        )
 
     @classmethod
-    def decode(cls, value: dict) -> Response:
+    def decode(
+        cls,
+        value: CachedResponse,
+        accept_encoding: Optional[str] = None,
+        if_none_match: Optional[str] = None,
+    ) -> Response:
+        """
+        Args:
+            if_none_match (str): 请求的 If-None-Match，与缓存的 ETag 匹配时返回不带 body 的 304
+        """
+        if etag_matches(value.etag, if_none_match):
+            headers = {
+                name: header_value
+                for name, header_value in value.headers.items()
+                if name in NOT_MODIFIED_HEADERS
+            }
+            if value.encodings:
+                headers["vary"] = "Accept-Encoding"
+            return Response(status_code=304, headers=headers)
+
+        encodings = value.encodings
+        if not encodings:
+            return Response(
+                content=value.body(),
+                headers=value.headers,
+                status_code=value.status_code,
+            )
+
+        headers = dict(value.headers)
+        headers["vary"] = "Accept-Encoding"
+        encoding = negotiate(accept_encoding, encodings)
+        if encoding is None:
+            body = value.body()
+        else:
+            body = value.body(encoding)
+            # 已经带 Content-Encoding，CompressionMiddleware 会直接放行
+            headers["content-encoding"] = encoding
+        headers["content-length"] = str(len(body))
         return Response(
-            content=bytes(value["body"], encoding="utf-8"),
-            headers=value["headers"],
-            status_code=value["status_code"],
+            content=body,
+            headers=headers,
+            status_code=value.status_code,
         )
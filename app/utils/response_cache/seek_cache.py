@@ -0,0 +1,51 @@
+"""
+分页边界缓存
+
+按 _id 排序的分页记录每页最后一项的 _id（边界），请求的 index 有不超过它的边界时，
+用 _id 与边界比较直接从索引定位，只需跳过边界之后的少量文档；按页顺序翻页时每页都是从边界开始
+
+key 带上数据版本（如每次 sync 统计文件数的时间），数据变化后版本不同，旧边界不会再被使用，过期后删除
+"""
+
+from typing import Any, Hashable, Optional, Tuple
+
+import orjson
+
+from app.utils.response_cache import Cache
+
+
+def seek_key(namespace: str, kind: str, version: Hashable) -> str:
+    return f"{namespace}:seek:{kind}:{version}"
+
+
+async def nearest(kind: str, version: Hashable, offset: int) -> Tuple[int, Optional[Any]]:
+    """
+    Returns:
+        Tuple[int, Optional[Any]]: 不超过 offset 的最近边界 (偏移量, 边界值)，没有时为 (0, None)
+    """
+    if not Cache.enabled or offset <= 0:
+        return 0, None
+    boundaries = await Cache.backend.hgetall(seek_key(Cache.namespace, kind, version))
+    best = max(
+        (int(position) for position in boundaries if int(position) <= offset),
+        default=None,
+    )
+    if best is None:
+        return 0, None
+    value = boundaries.get(str(best)) or boundaries.get(str(best).encode())
+    return best, orjson.loads(value)
+
+
+async def save(
+    kind: str, version: Hashable, offset: int, value: Any, expire: int
+) -> None:
+    """
+    记录 offset 位置的边界，即前 offset 项中最后一项的值
+    """
+    if not Cache.enabled or offset <= 0:
+        return
+    key = seek_key(Cache.namespace, kind, version)
+    async with Cache.backend.pipeline(transaction=False) as pipe:
+        pipe.hset(key, str(offset), orjson.dumps(value))
+        pipe.expire(key, expire, nx=True)
+        await pipe.execute()
@@ -0,0 +1,130 @@
+"""
+合并同一个 key 的并发缓存 miss
+
+进程内用 asyncio.Future，只有第一个请求真正执行，其余等待结果；
+发起者被取消（如客户端断开）时由一个等待者接替执行，其余等待者继续等待
+跨 worker 用 Redis 短锁，没抢到锁的 worker 轮询等待持锁者写入缓存
+"""
+
+import asyncio
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from redis.asyncio import Redis
+
+# key -> 正在计算的 Future
+_inflight: Dict[str, asyncio.Future] = {}
+
+# key -> 后台刷新任务，同时保持引用防止被 GC
+_background: Dict[str, asyncio.Task] = {}
+
+RELEASE_LOCK_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+else
+    return 0
+end
+"""
+
+
+class LeaderCancelled(Exception):
+    """
+    发起者被取消，等待者收到后重新竞争执行
+    """
+
+
+def lock_key(key: str) -> str:
+    return f"{key}:lock"
+
+
+async def do(
+    key: str, compute: Callable[[], Awaitable[Tuple[Any, Any]]]
+) -> Tuple[Any, Any]:
+    """
+    同一进程内同一个 key 只执行一次 compute
+
+    compute 返回 (result, shared)，result 只交给发起者，shared 交给所有等待者
+
+    Returns:
+        Tuple[Any, Any]: 发起者得到 (result, shared)，等待者得到 (None, shared)
+    """
+    while True:
+        future = _inflight.get(key)
+        if future is None:
+            break
+        try:
+            # shield 防止某个等待者被取消时连带取消 Future
+            return None, await asyncio.shield(future)
+        except LeaderCancelled:
+            continue
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        result, shared = await compute()
+    except asyncio.CancelledError:
+        # 不把 CancelledError 传给等待者，让它们接替执行
+        future.set_exception(LeaderCancelled(key))
+        future.exception()
+        raise
+    except BaseException as e:
+        future.set_exception(e)
+        # 没有等待者时不要报 "Future exception was never retrieved"
+        future.exception()
+        raise
+    else:
+        future.set_result(shared)
+        return result, shared
+    finally:
+        if _inflight.get(key) is future:
+            _inflight.pop(key)
+
+
+def background(key: str, coro: Callable[[], Awaitable[Any]]) -> bool:
+    """
+    后台执行 coro，同一进程内同一个 key 同时只有一个
+
+    Returns:
+        bool: 是否启动了新任务
+    """
+    if key in _background:
+        return False
+    task = asyncio.create_task(coro())
+    _background[key] = task
+    task.add_done_callback(lambda _: _background.pop(key, None))
+    return True
+
+
+async def acquire_lock(backend: Redis, key: str, timeout: int) -> Optional[str]:
+    """
+    抢 Redis 短锁，成功返回 token
+    """
+    token = uuid.uuid4().hex
+    if await backend.set(lock_key(key), token, px=int(timeout * 1000), nx=True):
+        return token
+    return None
+
+
+async def release_lock(backend: Redis, key: str, token: str) -> None:
+    # 只删除自己的锁，超时后锁可能已经被别人拿走
+    await backend.eval(RELEASE_LOCK_SCRIPT, 1, lock_key(key), token)
+
+
+async def wait_for_value(
+    backend: Redis, key: str, timeout: int, poll_interval: float
+) -> Optional[bytes]:
+    """
+    等待持锁的 worker 写入缓存
+
+    锁被释放但仍然没有值（比如结果不可缓存）或超时则返回 None，由调用方自行计算
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        await asyncio.sleep(poll_interval)
+        value, lock = await backend.mget([key, lock_key(key)])
+        if value is not None:
+            return value
+        if lock is None:
+            return None
+    return None
@@ -0,0 +1,120 @@
+"""
+按实体打标签的缓存失效
+
+缓存写入时把 key 记到它包含的实体的标签集合里，比如 cf:mod:123、mr:project:AANobbMI
+sync 写入 MongoDB 后按标签删除对应的缓存，不必等 TTL 过期
+
+注意进程内 L1 无法跨 worker 失效，最多滞后 l1_cache.ttl
+"""
+
+from typing import Iterable, Set, Union
+
+from redis import Redis
+from redis.asyncio import Redis as AioRedis
+
+from app.models.database.curseforge import (
+    Mod as CurseforgeMod,
+    File as CurseforgeFile,
+    Fingerprint as CurseforgeFingerprint,
+)
+from app.models.database.modrinth import (
+    Project as ModrinthProject,
+    Version as ModrinthVersion,
+    File as ModrinthFile,
+)
+
+TAG_NAMESPACE = "fastapi_cache:tag"
+
+# 删除所有标签下的 key 以及标签本身，分批 UNLINK 避免 unpack 参数过多
+INVALIDATE_SCRIPT = """
+local count = 0
+for _, tag in ipairs(KEYS) do
+    local keys = redis.call("SMEMBERS", tag)
+    for i = 1, #keys, 500 do
+        count = count + redis.call("UNLINK", unpack(keys, i, math.min(i + 499, #keys)))
+    end
+    redis.call("DEL", tag)
+end
+return count
+"""
+
+
+def cf_mod(modId: int) -> str:
+    return f"cf:mod:{modId}"
+
+
+def cf_file(fileId: int) -> str:
+    return f"cf:file:{fileId}"
+
+
+def mr_project(project_id: str) -> str:
+    return f"mr:project:{project_id}"
+
+
+def tag_key(tag: str) -> str:
+    return f"{TAG_NAMESPACE}:{tag}"
+
+
+def tags_for_models(
+    models: Iterable[
+        Union[
+            CurseforgeMod,
+            CurseforgeFile,
+            CurseforgeFingerprint,
+            ModrinthProject,
+            ModrinthVersion,
+            ModrinthFile,
+        ]
+    ]
+) -> Set[str]:
+    """
+    sync 写入的模型会影响哪些标签
+    """
+    tags = set()
+    for model in models:
+        if isinstance(model, CurseforgeMod):
+            tags.add(cf_mod(model.id))
+        elif isinstance(model, CurseforgeFile):
+            tags.add(cf_mod(model.modId))
+            tags.add(cf_file(model.id))
+        elif isinstance(model, CurseforgeFingerprint):
+            tags.add(cf_mod(model.file.modId))
+        elif isinstance(model, ModrinthProject):
+            tags.add(mr_project(model.id))
+        elif isinstance(model, (ModrinthVersion, ModrinthFile)):
+            if model.project_id:
+                tags.add(mr_project(model.project_id))
+    return tags
+
+
+async def add_tags(
+    backend: AioRedis, keys: Iterable[str], tags: Iterable[str], expire: int
+) -> None:
+    """
+    把 keys 记到标签集合里，标签集合的过期时间只延长不缩短
+    """
+    keys = list(keys)
+    async with backend.pipeline(transaction=False) as pipe:
+        for tag in tags:
+            pipe.sadd(tag_key(tag), *keys)
+            if expire:
+                pipe.expire(tag_key(tag), expire, nx=True)
+                pipe.expire(tag_key(tag), expire, gt=True)
+        await pipe.execute()
+
+
+async def invalidate_tags(backend: AioRedis, tags: Iterable[str]) -> int:
+    tag_keys = [tag_key(tag) for tag in set(tags)]
+    if not tag_keys:
+        return 0
+    return await backend.eval(INVALIDATE_SCRIPT, len(tag_keys), *tag_keys)
+
+
+def invalidate_tags_sync(backend: Redis, tags: Iterable[str]) -> int:
+    """
+    给 sync 用的同步版本
+    """
+    tag_keys = [tag_key(tag) for tag in set(tags)]
+    if not tag_keys:
+        return 0
+    return backend.eval(INVALIDATE_SCRIPT, len(tag_keys), *tag_keys)
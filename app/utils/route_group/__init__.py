@@ -0,0 +1,37 @@
+"""
+路由分组
+
+按 method + 路径前缀把请求归到 bulk / search / file_cdn / default 等分组，
+限流、并发隔离等按分组配置，规则见 MCIMConfig.route_groups
+"""
+
+from typing import Optional
+
+from app.config.mcim import MCIMConfig
+
+mcim_config = MCIMConfig.load()
+
+DEFAULT_GROUP = "default"
+
+# 最长前缀优先
+_RULES = sorted(
+    mcim_config.route_groups, key=lambda rule: len(rule.path_prefix), reverse=True
+)
+
+
+def classify(method: str, path: str) -> str:
+    for rule in _RULES:
+        if path.startswith(rule.path_prefix) and (
+            rule.methods is None or method in rule.methods
+        ):
+            return rule.name
+    return DEFAULT_GROUP
+
+
+def scope_group(scope: dict) -> Optional[str]:
+    """
+    ASGI scope 的分组，非 http 请求返回 None
+    """
+    if scope["type"] != "http":
+        return None
+    return classify(scope["method"], scope["path"])
@@ -0,0 +1,173 @@
+"""
+缓存预热
+
+TimingMiddleware 记录可缓存的热门 GET 请求，按小时分桶计数到 Redis 的 ZSET，
+部署或提升缓存代际后由一个 worker 在进程内通过 ASGI 重放最近 window_hours 的 top N，
+在真实流量到来之前把缓存填满
+"""
+
+import asyncio
+import time
+from collections import Counter
+from typing import List, Optional
+from urllib.parse import parse_qsl, urlencode
+
+import httpx
+from fastapi import FastAPI
+
+from app.config.mcim import MCIMConfig
+from app.utils.response_cache import Cache, singleflight
+from app.utils.route_group import classify
+from app.utils.loger import log
+
+mcim_config = MCIMConfig.load()
+warmup_config = mcim_config.warmup
+
+# 预热请求带上这个头，不再被记录
+WARMUP_HEADER = "x-mcim-warmup"
+
+IGNORE_PARAMS = ("force",)
+
+# 进程内待写入的计数，定期批量 ZINCRBY
+_pending: Counter = Counter()
+_last_flush: float = time.monotonic()
+
+
+def bucket_key(namespace: str, hour: int) -> str:
+    return f"{namespace}:warmup:{hour}"
+
+
+def done_key(namespace: str, generation: Optional[str]) -> str:
+    return f"{namespace}:warmup:done:{generation}"
+
+
+def normalize(path: str, query_string: str) -> str:
+    """
+    同一请求的参数顺序可能不同，排序后作为记录的 key
+    """
+    params = sorted(
+        (name, value)
+        for name, value in parse_qsl(query_string, keep_blank_values=True)
+        if name not in IGNORE_PARAMS
+    )
+    return f"{path}?{urlencode(params)}" if params else path
+
+
+def is_warmable(path: str) -> bool:
+    return path.startswith(tuple(warmup_config.path_prefixes)) and (
+        classify("GET", path) not in warmup_config.exclude_groups
+    )
+
+
+def should_record(method: str, path: str, status_code: int, headers) -> bool:
+    return (
+        warmup_config.enabled
+        and Cache.enabled
+        and method == "GET"
+        and status_code == 200
+        and WARMUP_HEADER not in headers
+        and is_warmable(path)
+    )
+
+
+def record(method: str, path: str, query_string: str, status_code: int, headers) -> None:
+    """
+    记录一次请求，攒够 flush_interval 后在后台写入 Redis
+    """
+    global _last_flush
+    if not should_record(method, path, status_code, headers):
+        return
+    _pending[normalize(path, query_string)] += 1
+    now = time.monotonic()
+    if now - _last_flush >= warmup_config.flush_interval:
+        _last_flush = now
+        singleflight.background(f"{Cache.base_namespace}:warmup:flush", flush)
+
+
+async def flush() -> None:
+    if not _pending:
+        return
+    counts = dict(_pending)
+    _pending.clear()
+    key = bucket_key(Cache.base_namespace, int(time.time() // 3600))
+    try:
+        async with Cache.backend.pipeline(transaction=False) as pipe:
+            for target, count in counts.items():
+                pipe.zincrby(key, count, target)
+            # 每个桶只保留 top N 的若干倍，防止长尾撑大 ZSET
+            pipe.zremrangebyrank(key, 0, -(warmup_config.top_n * 4) - 1)
+            pipe.expire(key, (warmup_config.window_hours + 1) * 3600)
+            await pipe.execute()
+    except Exception as e:
+        log.warning(f"Failed to flush warmup records: {e}")
+
+
+async def top_requests() -> List[str]:
+    hour = int(time.time() // 3600)
+    keys = [
+        bucket_key(Cache.base_namespace, hour - i)
+        for i in range(warmup_config.window_hours)
+    ]
+    result = await Cache.backend.zunion(keys, withscores=True)
+    result.sort(key=lambda item: item[1], reverse=True)
+    targets = [
+        target.decode() if isinstance(target, bytes) else target for target, _ in result
+    ]
+    # 过滤掉配置变更前记录的请求
+    return [target for target in targets if is_warmable(target.split("?", 1)[0])][
+        : warmup_config.top_n
+    ]
+
+
+async def replay(app: FastAPI) -> int:
+    """
+    在进程内重放热门请求，同一缓存代际 cooldown 内只由一个 worker 执行一次
+
+    Returns:
+        int: 成功预热的请求数
+    """
+    if not warmup_config.enabled or not Cache.enabled:
+        return 0
+    namespace = Cache.base_namespace
+    if await Cache.backend.exists(done_key(namespace, Cache.generation)):
+        return 0
+    lock = f"{namespace}:warmup"
+    token = await singleflight.acquire_lock(
+        Cache.backend, lock, timeout=warmup_config.cooldown
+    )
+    if token is None:
+        # 其他 worker 正在预热
+        return 0
+
+    try:
+        targets = await top_requests()
+        semaphore = asyncio.Semaphore(warmup_config.concurrency)
+        start = time.perf_counter()
+
+        async def replay_one(client: httpx.AsyncClient, target: str) -> bool:
+            async with semaphore:
+                try:
+                    response = await client.get(target)
+                    return response.status_code == 200
+                except Exception as e:
+                    log.warning(f"Warmup {target} failed: {e}")
+                    return False
+
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://mcim-warmup",
+            headers={WARMUP_HEADER: "1", "User-Agent": "mcim-warmup"},
+            timeout=warmup_config.timeout,
+        ) as client:
+            results = await asyncio.gather(
+                *(replay_one(client, target) for target in targets)
+            )
+        await Cache.backend.set(
+            done_key(namespace, Cache.generation), 1, ex=warmup_config.cooldown
+        )
+        log.info(
+            f"Warmup finished: {sum(results)}/{len(targets)} in {time.perf_counter() - start:.2f}s"
+        )
+        return sum(results)
+    finally:
+        await singleflight.release_lock(Cache.backend, lock, token)
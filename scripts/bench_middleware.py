@@ -0,0 +1,114 @@
+"""
+中间件开销对比
+
+旧实现：BaseHTTPMiddleware
+新实现：纯 ASGI 中间件
+
+路由直接返回固定的 Response，近似缓存命中，只测中间件本身的开销
+
+在仓库根目录运行: python -m scripts.bench_middleware
+"""
+
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI, Request
+from fastapi.responses import Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from app.utils.middleware import (
+    TimingMiddleware,
+    CountTrustableMiddleware,
+    UncachePOSTMiddleware,
+)
+
+ROUNDS = 3000
+
+BODY = b'{"id":"AANobbMI","slug":"sodium"}' * 32
+
+
+# 旧实现，仅用于对比
+class LegacyTimingMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        start_time = time.time()
+        response = await call_next(request)
+        process_time = time.time() - start_time
+        route = request.scope.get("route")
+        if route:
+            route.name, process_time
+        return response
+
+
+class LegacyCountTrustableMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        route = request.scope.get("route")
+        if route:
+            response.headers.get("Trustable") == "True"
+        return response
+
+
+class LegacyUncachePOSTMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        if request.method == "POST":
+            response.headers["Cache-Control"] = "no-cache"
+        return response
+
+
+def build_app(middlewares) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/modrinth/v2/project/{idslug}")
+    async def project(idslug: str):
+        return Response(content=BODY, media_type="application/json")
+
+    for middleware in middlewares:
+        app.add_middleware(middleware)
+    return app
+
+
+async def bench(name: str, app: FastAPI) -> float:
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench"
+    ) as client:
+        # 预热
+        for _ in range(100):
+            await client.get("/modrinth/v2/project/AANobbMI")
+        # 取三轮中最快的一轮，减少抖动
+        seconds = float("inf")
+        for _ in range(3):
+            start = time.perf_counter()
+            for _ in range(ROUNDS):
+                await client.get("/modrinth/v2/project/AANobbMI")
+            seconds = min(seconds, (time.perf_counter() - start) / ROUNDS)
+    print(f"{name:<24} {seconds * 1000 * 1000:>10.1f} us/request")
+    return seconds
+
+
+async def main():
+    baseline = await bench("no middleware", build_app([]))
+    legacy = await bench(
+        "BaseHTTPMiddleware",
+        build_app(
+            [
+                LegacyTimingMiddleware,
+                LegacyCountTrustableMiddleware,
+                LegacyUncachePOSTMiddleware,
+            ]
+        ),
+    )
+    asgi = await bench(
+        "pure ASGI",
+        build_app(
+            [TimingMiddleware, CountTrustableMiddleware, UncachePOSTMiddleware]
+        ),
+    )
+    print(
+        f"\nmiddleware overhead: {(legacy - baseline) * 1e6:.1f} us -> {(asgi - baseline) * 1e6:.1f} us"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
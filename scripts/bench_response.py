@@ -0,0 +1,96 @@
+"""
+BaseResponse 构造耗时对比
+
+旧实现：orjson.dumps 计算 ETag 后 render 再序列化一次
+新实现：只 render 一次，ETag 对渲染后的 body 计算（安装 xxhash 时用 xxh3_128）
+
+在仓库根目录运行: python -m scripts.bench_response
+"""
+
+import hashlib
+import timeit
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+from app.utils.response import BaseResponse, xxhash
+from scripts.bench_response_cache import fake_version, random_text
+
+ROUNDS = 20
+
+
+def fake_curseforge_file(i: int) -> dict:
+    """
+    近似一个 CurseForge File
+    """
+    return {
+        "id": 4000000 + i,
+        "gameId": 432,
+        "modId": 238222,
+        "isAvailable": True,
+        "displayName": f"jei-1.20.1-forge-15.2.0.{i}.jar",
+        "fileName": f"jei-1.20.1-forge-15.2.0.{i}.jar",
+        "releaseType": 1,
+        "fileStatus": 4,
+        "hashes": [
+            {"value": "a" * 40, "algo": 1},
+            {"value": "b" * 32, "algo": 2},
+        ],
+        "fileDate": "2024-01-01T00:00:00Z",
+        "fileLength": 1024 * 1024,
+        "downloadCount": i * 100,
+        "downloadUrl": f"https://edge.forgecdn.net/files/4000/{i:03d}/jei.jar",
+        "gameVersions": ["1.20.1", "Forge", "Client", "Server"],
+        "sortableGameVersions": [
+            {
+                "gameVersionName": "1.20.1",
+                "gameVersionPadded": "0000000001.0000000020.0000000001",
+                "gameVersion": "1.20.1",
+                "gameVersionReleaseDate": "2023-06-12T00:00:00Z",
+                "gameVersionTypeId": 75125,
+            }
+        ],
+        "dependencies": [],
+        "alternateFileId": 0,
+        "isServerPack": False,
+        "fileFingerprint": 1234567890 + i,
+        "modules": [{"name": "META-INF", "fingerprint": 987654321}],
+        "changelog": random_text(500),
+    }
+
+
+# 旧实现，仅用于对比
+class LegacyBaseResponse(ORJSONResponse):
+    def __init__(self, status_code: int = 200, content=None, headers=None):
+        headers = dict(headers) if headers else {}
+        hash_tool = hashlib.sha1()
+        hash_tool.update(orjson.dumps(content))
+        hash_tool.update(str(status_code).encode())
+        headers["Etag"] = hash_tool.hexdigest()
+        super().__init__(status_code=status_code, content=content, headers=headers)
+
+
+def bench(name: str, func) -> float:
+    seconds = timeit.timeit(func, number=ROUNDS) / ROUNDS
+    print(f"{name:<32} {seconds * 1000:>10.3f} ms")
+    return seconds
+
+
+def main():
+    print(f"ETag hash: {'xxh3_128' if xxhash is not None else 'sha1'}")
+    payloads = {
+        "modrinth versions": [fake_version(i) for i in range(2000)],
+        "curseforge files": {
+            "data": [fake_curseforge_file(i) for i in range(2000)],
+            "pagination": {"index": 0, "pageSize": 2000, "totalCount": 2000},
+        },
+    }
+    for name, content in payloads.items():
+        size = len(orjson.dumps(content))
+        print(f"\n{name}, body {size / 1024 / 1024:.2f} MiB")
+        bench("legacy", lambda: LegacyBaseResponse(content=content))
+        bench("single pass", lambda: BaseResponse(content=content))
+
+
+if __name__ == "__main__":
+    main()
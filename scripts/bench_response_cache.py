@@ -0,0 +1,105 @@
+"""
+响应缓存封装的编解码耗时对比
+
+旧格式：body 解码为 str 后和 headers 一起 orjson.dumps
+新格式：二进制封装，body 原样拼接
+
+在仓库根目录运行: python -m scripts.bench_response_cache
+"""
+
+import random
+import string
+import timeit
+
+import orjson
+from fastapi.responses import Response
+
+from app.utils.response import BaseResponse
+from app.utils.response_cache.resp_builder import ResponseBuilder
+
+ROUNDS = 50
+
+
+def random_text(length: int) -> str:
+    return "".join(random.choices(string.ascii_letters + " \n", k=length))
+
+
+def fake_version(i: int) -> dict:
+    """
+    近似一个 Modrinth Version
+    """
+    return {
+        "id": f"{i:08d}",
+        "project_id": "AANobbMI",
+        "name": f"Sodium 0.5.{i}",
+        "version_number": f"mc1.20.1-0.5.{i}",
+        "changelog": random_text(1500),
+        "dependencies": [],
+        "game_versions": ["1.20", "1.20.1"],
+        "version_type": "release",
+        "loaders": ["fabric", "quilt"],
+        "featured": False,
+        "status": "listed",
+        "author_id": "DzLrfrbK",
+        "date_published": "2024-01-01T00:00:00Z",
+        "downloads": i * 1000,
+        "files": [
+            {
+                "hashes": {"sha1": "a" * 40, "sha512": "b" * 128},
+                "url": f"https://cdn.modrinth.com/data/AANobbMI/versions/{i:08d}/sodium.jar",
+                "filename": "sodium.jar",
+                "primary": True,
+                "size": 1024 * 1024,
+                "file_type": None,
+            }
+        ],
+        "found": True,
+        "sync_at": "2024-01-01T00:00:00Z",
+    }
+
+
+# 旧实现，仅用于对比
+def legacy_encode(value: Response) -> bytes:
+    return orjson.dumps(
+        {
+            "body": value.body.decode("utf-8"),
+            "headers": dict(value.headers),
+            "status_code": value.status_code,
+        }
+    )
+
+
+def legacy_decode(value: bytes) -> Response:
+    value = orjson.loads(value)
+    return Response(
+        content=bytes(value["body"], encoding="utf-8"),
+        headers=value["headers"],
+        status_code=value["status_code"],
+    )
+
+
+def bench(name: str, func) -> float:
+    seconds = timeit.timeit(func, number=ROUNDS) / ROUNDS
+    print(f"{name:<32} {seconds * 1000:>10.3f} ms")
+    return seconds
+
+
+def main():
+    for count in (100, 1000, 5000):
+        response = BaseResponse(content=[fake_version(i) for i in range(count)])
+        print(f"\n{count} versions, body {len(response.body) / 1024 / 1024:.2f} MiB")
+
+        legacy = legacy_encode(response)
+        binary = ResponseBuilder.encode(response)
+
+        bench("legacy encode", lambda: legacy_encode(response))
+        bench("binary encode", lambda: ResponseBuilder.encode(response))
+        bench("legacy decode", lambda: legacy_decode(legacy))
+        bench(
+            "binary decode",
+            lambda: ResponseBuilder.decode(ResponseBuilder.load(binary)),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+"""
+提升响应缓存代际，部署后需要整体作废缓存时使用
+
+worker 重启后切换到新代际，旧代际的 key 由 worker 在后台清理
+
+在仓库根目录运行: python -m scripts.bump_cache_generation
+"""
+
+from app.database._redis import init_sync_redis_engine, close_sync_redis_engine
+from app.utils.response_cache import Cache
+from app.utils.response_cache.generation import bump_generation
+
+
+def main():
+    redis_engine = init_sync_redis_engine()
+    generation = bump_generation(redis_engine, Cache.base_namespace)
+    print(f"Cache generation bumped to {generation}")
+    close_sync_redis_engine()
+
+
+if __name__ == "__main__":
+    main()
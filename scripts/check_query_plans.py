@@ -0,0 +1,261 @@
+"""
+检查控制器查询的执行计划，发现 COLLSCAN 时以非零状态退出
+
+在独立的数据库中写入少量样例文档并创建 app/database/indexes.py 中的索引，
+再对下面 QUERIES 中的查询执行 explain，检查胜出计划（包括 $lookup 子查询）是否有全表扫描
+
+QUERIES 与控制器中的查询保持一致，新增查询时一并补充
+
+需要本地 mongod，使用 mongodb.json 中的连接配置
+在仓库根目录运行: python -m scripts.check_query_plans [--keep]
+"""
+
+import argparse
+import sys
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Type
+
+from odmantic import Model, SyncEngine
+
+from app.database.indexes import apply_indexes_sync
+from app.database.mongodb import init_mongodb_syncengine
+from app.models.database.curseforge import Mod, File, Fingerprint, ModFileCount
+from app.models.database.modrinth import (
+    Project,
+    Version,
+    File as ModrinthFile,
+    LatestVersion,
+)
+from app.models.database.file_cdn import File as CDNFile
+
+DATABASE = "mcim_backend_plan_check"
+
+SHA1 = "a" * 40
+SHA512 = "b" * 128
+
+
+class PlanQuery(NamedTuple):
+    name: str
+    model: Type[Model]
+    filter: Optional[Dict[str, Any]] = None  # find
+    pipeline: Optional[List[Dict[str, Any]]] = None  # aggregate
+
+
+QUERIES: List[PlanQuery] = [
+    # CurseForge
+    PlanQuery("cf mod", Mod, filter={"_id": 238222}),
+    PlanQuery("cf mods", Mod, filter={"_id": {"$in": [238222, 306612]}}),
+    PlanQuery("cf file", File, filter={"modId": 238222, "_id": 4000000}),
+    PlanQuery("cf files", File, filter={"_id": {"$in": [4000000, 4000001]}}),
+    PlanQuery("cf fingerprints", Fingerprint, filter={"_id": {"$in": [1, 2]}}),
+    PlanQuery(
+        "cf mod files seek",
+        File,
+        pipeline=[
+            {
+                "$match": {
+                    "modId": 238222,
+                    "gameVersions": {"$all": ["1.20.1", "Forge"]},
+                    "_id": {"$lt": 4000005},
+                }
+            },
+            {"$sort": {"_id": -1}},
+            {"$limit": 50},
+        ],
+    ),
+    PlanQuery(
+        "cf mod files skip",
+        File,
+        pipeline=[
+            {"$match": {"modId": 238222}},
+            {"$sort": {"_id": -1}},
+            {"$skip": 5},
+            {"$limit": 50},
+            {"$project": {"_id": 1}},
+        ],
+    ),
+    PlanQuery("cf mod file counts", ModFileCount, filter={"_id": 238222}),
+    PlanQuery(
+        "file_cdn cf file",
+        File,
+        filter={"_id": 4000000, "fileName": "jei.jar", "found": True},
+    ),
+    # Modrinth
+    PlanQuery(
+        "mr project", Project, filter={"$or": [{"_id": "AANobbMI"}, {"slug": "sodium"}]}
+    ),
+    PlanQuery("mr versions", Version, filter={"_id": {"$in": ["v1", "v2"]}}),
+    PlanQuery(
+        "mr project versions by project_id", Version, filter={"project_id": "AANobbMI"}
+    ),
+    PlanQuery("mr version_file sha1", ModrinthFile, filter={"_id.sha1": SHA1, "found": True}),
+    PlanQuery("mr version_file sha512", ModrinthFile, filter={"_id.sha512": SHA512}),
+    PlanQuery(
+        "mr version_files", ModrinthFile, filter={"_id.sha1": {"$in": [SHA1]}, "found": True}
+    ),
+    PlanQuery(
+        "mr version_file update",
+        LatestVersion,
+        filter={
+            "project_id": {"$in": ["AANobbMI"]},
+            "loader": {"$in": ["fabric"]},
+            "game_version": {"$in": ["1.20.1"]},
+        },
+    ),
+    PlanQuery(
+        "mr latest version rebuild", Version, filter={"project_id": {"$in": ["AANobbMI"]}}
+    ),
+    PlanQuery(
+        "file_cdn mr file",
+        ModrinthFile,
+        filter={
+            "project_id": "AANobbMI",
+            "version_id": "v1",
+            "filename": "sodium.jar",
+            "found": True,
+        },
+    ),
+    # File CDN
+    PlanQuery("file_cdn file", CDNFile, filter={"_id": SHA1}),
+    PlanQuery(
+        "file_cdn list",
+        CDNFile,
+        pipeline=[
+            {"$match": {"mtime": {"$gt": 0}, "_id": {"$gt": ""}, "disable": {"$ne": True}}},
+            {"$sort": {"_id": 1}},
+            {"$limit": 1000},
+        ],
+    ),
+]
+
+
+def seed(engine: SyncEngine) -> None:
+    """
+    写入少量样例文档，空集合的 explain 只会得到 EOF
+    """
+    db = engine.database
+    db[Mod.__collection__].insert_many(
+        [{"_id": 238222, "slug": "jei"}, {"_id": 306612, "slug": "fabric-api"}]
+    )
+    db[File.__collection__].insert_many(
+        [
+            {
+                "_id": 4000000 + i,
+                "modId": 238222,
+                "fileName": "jei.jar",
+                "gameVersions": ["1.20.1", "Forge"],
+                "found": True,
+            }
+            for i in range(10)
+        ]
+    )
+    db[Fingerprint.__collection__].insert_many([{"_id": 1}, {"_id": 2}])
+    db[ModFileCount.__collection__].insert_many([{"_id": 238222, "total": 10}])
+    db[Project.__collection__].insert_many(
+        [{"_id": "AANobbMI", "slug": "sodium", "versions": ["v1", "v2"]}]
+    )
+    db[Version.__collection__].insert_many(
+        [
+            {
+                "_id": f"v{i}",
+                "project_id": "AANobbMI",
+                "game_versions": ["1.20.1"],
+                "loaders": ["fabric"],
+                "date_published": f"2024-01-{i + 1:02d}T00:00:00Z",
+            }
+            for i in range(10)
+        ]
+    )
+    db[ModrinthFile.__collection__].insert_many(
+        [
+            {
+                "_id": {"sha512": SHA512[:-1] + str(i), "sha1": SHA1[:-1] + str(i)},
+                "project_id": "AANobbMI",
+                "version_id": f"v{i}",
+                "filename": "sodium.jar",
+                "found": True,
+            }
+            for i in range(10)
+        ]
+    )
+    db[LatestVersion.__collection__].insert_many(
+        [
+            {
+                "project_id": "AANobbMI",
+                "loader": "fabric",
+                "game_version": f"1.20.{i}",
+                "version_id": f"v{i}",
+            }
+            for i in range(10)
+        ]
+    )
+    db[CDNFile.__collection__].insert_many(
+        [{"_id": SHA1[:-1] + str(i), "mtime": i, "disable": False} for i in range(10)]
+    )
+
+
+def explain(engine: SyncEngine, plan_query: PlanQuery) -> Dict[str, Any]:
+    collection = plan_query.model.__collection__
+    if plan_query.pipeline is not None:
+        command = {"aggregate": collection, "pipeline": plan_query.pipeline, "cursor": {}}
+    else:
+        command = {"find": collection, "filter": plan_query.filter}
+    return engine.database.command(
+        {"explain": command, "verbosity": "executionStats"}
+    )
+
+
+def collection_scans(node: Any) -> Iterator[str]:
+    """
+    遍历 explain 结果，跳过 rejectedPlans，返回发现的全表扫描
+    """
+    if isinstance(node, dict):
+        if node.get("stage") == "COLLSCAN":
+            yield node.get("namespace") or "COLLSCAN"
+        # $lookup 的子查询只体现在执行统计里
+        if "$lookup" in node and node.get("collectionScans"):
+            yield f"$lookup from {node['$lookup'].get('from')}"
+        for key, value in node.items():
+            if key != "rejectedPlans":
+                yield from collection_scans(value)
+    elif isinstance(node, list):
+        for value in node:
+            yield from collection_scans(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check query plans for COLLSCAN")
+    parser.add_argument(
+        "--keep", action="store_true", help=f"keep the {DATABASE} database"
+    )
+    args = parser.parse_args()
+
+    client = init_mongodb_syncengine().client
+    client.drop_database(DATABASE)
+    engine = SyncEngine(client=client, database=DATABASE)
+    try:
+        seed(engine)
+        # 与 setup_async_mongodb 一致：先创建 Model 上声明的索引，再创建注册表中的索引
+        engine.configure_database(
+            [Mod, File, Fingerprint, Project, Version, ModrinthFile, CDNFile]
+        )
+        apply_indexes_sync(engine)
+
+        failed = 0
+        for plan_query in QUERIES:
+            scans = sorted(set(collection_scans(explain(engine, plan_query))))
+            if scans:
+                failed += 1
+                print(f"COLLSCAN {plan_query.name}: {', '.join(scans)}")
+            else:
+                print(f"ok       {plan_query.name}")
+    finally:
+        if not args.keep:
+            client.drop_database(DATABASE)
+
+    if failed:
+        print(f"{failed} of {len(QUERIES)} queries do a collection scan")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""
+管理 app/database/indexes.py 中声明的索引
+
+list   列出注册表中的索引及是否已创建
+apply  创建缺少的索引（后台构建）
+
+在仓库根目录运行: python -m scripts.manage_indexes [list|apply]
+"""
+
+import argparse
+
+from app.database.indexes import INDEXES, apply_indexes_sync, missing_indexes_sync
+from app.database.mongodb import init_mongodb_syncengine
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage MongoDB indexes")
+    parser.add_argument("action", choices=["list", "apply"], nargs="?", default="list")
+    args = parser.parse_args()
+
+    engine = init_mongodb_syncengine()
+    if args.action == "apply":
+        names = apply_indexes_sync(engine)
+        print(f"Indexes ensured: {', '.join(names)}")
+        return
+
+    missing = {spec.name for spec in missing_indexes_sync(engine)}
+    for spec in INDEXES:
+        keys = ", ".join(f"{field}: {direction}" for field, direction in spec.keys)
+        status = "missing" if spec.name in missing else "ok"
+        print(
+            f"{status:8}{spec.model.__collection__}.{spec.name} {{{keys}}}"
+        )
+
+
+if __name__ == "__main__":
+    main()